@@ -1,57 +1,47 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+from rwmh import REPULSIVE_MU as repulsive_mu, adaptive_rwmh, log_posterior, rwmh, summary
+
 # Set seed for reproducibility
-np.random.seed(12345)
+rng = np.random.default_rng(12345)
 
-# Initialize parameters
+# Initialize parameters: the first chain starts at (-1, 1), the others spread over the grid
+num_chains = 8
 initial_theta = np.array([-1.0, 1.0])
 num_iterations = 20000
-theta_current = initial_theta.copy()
-epsilon = 1e-8
-
-# Define repulsive points (4x4 grid from -3 to +3)
-grid_points = np.linspace(-3, 3, 4)
-repulsive_mu = np.array(np.meshgrid(grid_points, grid_points)).T.reshape(-1, 2)
-
-# Storage for the chain and running mean
-chain = np.zeros((num_iterations, 2))
-chain[0] = theta_current
-running_mean = np.zeros((num_iterations, 2))
-running_mean[0] = theta_current
-
-# Log-posterior function
-def log_posterior(theta):
-    log_lik = -0.5 * np.sum(theta**2)
-    distances_sq = np.sum((theta - repulsive_mu)**2, axis=1) + epsilon
-    repulsive_prior = -np.sum(1.0 / distances_sq)
-    return log_lik + repulsive_prior
+adaptive = False  # True: learn the proposal covariance and scale during 2000 warm-up steps
+theta_initial = np.vstack([initial_theta, rng.uniform(-4, 4, size=(num_chains - 1, 2))])
 
-current_log_posterior = log_posterior(theta_current)
+# MCMC Sampling: all chains advance together, log_posterior (defined in rwmh.py) is
+# evaluated for the K proposals at once against the 4x4 grid of repulsive points
+if adaptive:
+    result = adaptive_rwmh(log_posterior, theta_initial, num_iterations, warmup=2000, seed=rng)
+else:
+    result = rwmh(log_posterior, theta_initial, num_iterations, step=np.sqrt(0.2), seed=rng)
+chains = result["chains"]        # (num_chains, num_iterations, 2)
+chain = chains[0]
 
-# MCMC Sampling with running mean calculation
-for i in range(1, num_iterations):
-    proposal = np.random.normal(theta_current, np.sqrt(0.2), size=2)
-    proposal_log_posterior = log_posterior(proposal)
-    if np.log(np.random.uniform()) < (proposal_log_posterior - current_log_posterior):
-        theta_current = proposal
-        current_log_posterior = proposal_log_posterior
-    chain[i] = theta_current
-    # Update running mean
-    running_mean[i] = running_mean[i-1] + (theta_current - running_mean[i-1]) / (i + 1)
+# Running mean over all chains and online (Welford) summary statistics, computed by rwmh
+# while sampling; for long runs pass thin=... and out="draws.npy" (or out=False) to keep RAM constant
+running_mean = result["running_mean"]
+theta_mean = result["mean"]
+theta_std = result["std"]
 
-# Summary statistics
-theta_mean = chain.mean(axis=0)
-theta_std = chain.std(axis=0)
+# Convergence diagnostics (R-hat close to 1, ESS = effective draws)
+stats = summary(chains)
 print(f"Posterior Mean: {theta_mean}")
 print(f"Posterior Std Dev: {theta_std}")
+print(f"Acceptance rate: {result['acceptance'].mean():.2f}")
+print(f"Split R-hat: {stats['rhat']}")
+print(f"Effective sample size: {stats['ess']}")
 
 # Plotting the chain and repulsive points
 plt.figure(figsize=(12, 5))
 
 # 1. Plot the MCMC Chain
 plt.subplot(1, 2, 1)
-plt.plot(chain[:, 0], chain[:, 1], alpha=0.3, label='MCMC Chain')
+plt.plot(chain[:, 0], chain[:, 1], alpha=0.3, label=f'MCMC Chain (first of {num_chains})')
 plt.scatter(repulsive_mu[:, 0], repulsive_mu[:, 1], color='red', label='Repulsive Points')
 plt.xlabel(r'$\theta_1$')
 plt.ylabel(r'$\theta_2$')
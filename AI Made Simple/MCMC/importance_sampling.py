@@ -0,0 +1,101 @@
+import numpy as np
+
+# Importance sampling with the prior as proposal, as in "Monte Carlo Approx.py":
+#
+#   E[h(θ) | x] ≈ Σ h(θ_j) w_j / Σ w_j,   θ_j ~ prior,   w_j = p(x | θ_j) = exp(Σ_i log p(x_i | θ_j))
+#
+# The original loop computes w_j = exp(Σ log p) one θ at a time, which underflows to 0
+# (and gives 0/0) as soon as the sum of log-likelihoods is below about -745, e.g. for
+# 200 Cauchy observations. Here:
+#   - the log-likelihood of a whole block of θ draws is one matrix operation,
+#   - weights never leave log space: running sums use np.logaddexp.accumulate, so the
+#     running posterior mean is exact at every iteration and never overflows or underflows,
+#   - draws are generated and processed in chunks, so memory depends on chunk_size and
+#     not on m (m = 10^7 works on a laptop; keep the trace sparse with trace_every).
+
+CHUNK_SIZE = 20000
+
+
+def cauchy_log_likelihood(x, scale=1.0):
+    """Log-likelihood of the data x for a block of Cauchy locations, as one (block, n) matrix operation."""
+    x = np.asarray(x, dtype=float)
+
+    def log_likelihood(theta):
+        z = (x[None, :] - theta[:, None]) / scale
+        return -len(x) * np.log(np.pi * scale) - np.log1p(z**2).sum(axis=1)
+
+    return log_likelihood
+
+
+def normal_prior(mu=0.0, s2=1.0):
+    def sample(rng, size):
+        return rng.normal(loc=mu, scale=np.sqrt(s2), size=size)
+
+    return sample
+
+
+def _signed_log(values):
+    # log|v| for the positive and the negative part separately (-inf where the part is 0)
+    with np.errstate(divide="ignore"):
+        return np.log(np.maximum(values, 0)), np.log(np.maximum(-values, 0))
+
+
+def importance_sampling(log_likelihood, sample_prior, m, h=None, chunk_size=CHUNK_SIZE, seed=None, trace_every=1):
+    """
+    Self-normalised importance sampling estimate of E[h(θ) | x] with prior draws.
+
+    log_likelihood(theta_block) -> log p(x | θ) for every θ in the block
+    sample_prior(rng, size)     -> size draws from the prior
+    h                           -> function of θ to average (default: θ itself)
+
+    Returns a dict with the final estimate, the Kish effective sample size
+    (Σw)² / Σw², the log marginal likelihood estimate log(Σw / m), and the running
+    estimate after every trace_every draws (trace, with the matching 1-based
+    iteration numbers in trace_index).
+    """
+    rng = np.random.default_rng(seed)
+    h = h or (lambda theta: theta)
+
+    # Running log sums: Σw, Σw², Σ h⁺ w and Σ h⁻ w (h can be negative)
+    log_den = log_den2 = log_pos = log_neg = -np.inf
+    trace = []
+    trace_index = []
+
+    for start in range(0, m, chunk_size):
+        size = min(chunk_size, m - start)
+        theta = sample_prior(rng, size)
+        log_w = log_likelihood(theta)
+        log_h_pos, log_h_neg = _signed_log(h(theta))
+
+        # Cumulative sums in log space, continuing from the previous chunk
+        den = np.logaddexp.accumulate(np.concatenate(([log_den], log_w)))[1:]
+        pos = np.logaddexp.accumulate(np.concatenate(([log_pos], log_w + log_h_pos)))[1:]
+        neg = np.logaddexp.accumulate(np.concatenate(([log_neg], log_w + log_h_neg)))[1:]
+        log_den, log_pos, log_neg = den[-1], pos[-1], neg[-1]
+        log_den2 = np.logaddexp(log_den2, np.logaddexp.reduce(2 * log_w))
+
+        # Iterations start + 1 ... start + size that fall on the trace grid
+        keep = np.arange(start + 1, start + size + 1) % trace_every == 0
+        if keep.any():
+            trace.append(np.exp(pos[keep] - den[keep]) - np.exp(neg[keep] - den[keep]))
+            trace_index.append(np.arange(start + 1, start + size + 1)[keep])
+
+    return {
+        "mean": float(np.exp(log_pos - log_den) - np.exp(log_neg - log_den)),
+        "ess": float(np.exp(2 * log_den - log_den2)),
+        "log_evidence": float(log_den - np.log(m)),
+        "trace": np.concatenate(trace) if trace else np.zeros(0),
+        "trace_index": np.concatenate(trace_index) if trace_index else np.zeros(0, dtype=int),
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    # Same model as "Monte Carlo Approx.py", with a fixed seed and m = 10^7
+    rng = np.random.default_rng(1)
+    x = 0.5 + rng.standard_cauchy(200)
+    start = time.perf_counter()
+    result = importance_sampling(cauchy_log_likelihood(x), normal_prior(0, 1), 10**7, seed=2, trace_every=1000)
+    print(f"m = 10^7 in {time.perf_counter() - start:.1f} s")
+    print(f"Posterior mean: {result['mean']:.5f}, ESS: {result['ess']:.0f}, log evidence: {result['log_evidence']:.3f}")
@@ -0,0 +1,362 @@
+import os
+import time
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# Batched Random Walk Metropolis-Hastings for the repulsive-grid example of
+# "Random Walk Metropolis-Hastings.py".
+#
+# Instead of one chain advanced in a Python loop with one log_posterior call per step,
+# K independent chains are stored as a (K, d) array and advanced in lockstep: every
+# iteration draws K proposals, evaluates log_posterior for all of them in one broadcast
+# against the repulsive points, and accepts or rejects them with one comparison.
+# The Python loop is over iterations only, so K chains cost about as much as one.
+# Groups of chains can also be spread over a process pool (run_chains(workers=...)).
+#
+# With several chains we can check convergence: split-R-hat (close to 1 when all the
+# half-chains agree) and the effective sample size per parameter (Stan's estimator,
+# Geyer's initial monotone sequence on the multi-chain autocorrelation).
+#
+# adaptive_rwmh() learns the proposal during warm-up instead of using the fixed
+# isotropic step: the covariance of all chains' states so far (Haario et al.'s
+# adaptive Metropolis, pooled across chains) and a global scale tuned by Robbins-Monro
+# towards a target acceptance rate. After warm-up both are frozen, so the sampling
+# phase is a plain (valid) Metropolis chain. benchmark() compares ESS per second.
+#
+# For long runs rwmh() streams: summaries are Welford online moments, draws can be
+# thinned and written chunk by chunk, with the running mean, to memory-mapped .npy
+# files (or not kept at all), so 10^8 iterations run in constant RAM.
+
+EPSILON = 1e-8
+STEP = np.sqrt(0.2)
+TARGET_ACCEPTANCE = 0.3
+CHUNK_SIZE = 4096  # Iterations buffered between writes
+
+# Repulsive points (4x4 grid from -3 to +3)
+grid_points = np.linspace(-3, 3, 4)
+REPULSIVE_MU = np.array(np.meshgrid(grid_points, grid_points)).T.reshape(-1, 2)
+
+
+def log_posterior(theta, repulsive_mu=REPULSIVE_MU, epsilon=EPSILON):
+    """Log-posterior of the repulsive example for theta of shape (..., d); returns shape (...)."""
+    theta = np.asarray(theta, dtype=float)
+    log_lik = -0.5 * np.sum(theta**2, axis=-1)
+    distances_sq = np.sum((theta[..., None, :] - repulsive_mu)**2, axis=-1) + epsilon
+    repulsive_prior = -np.sum(1.0 / distances_sq, axis=-1)
+    return log_lik + repulsive_prior
+
+
+class OnlineMoments:
+    """Welford/Chan running mean and variance per chain, updated with blocks of draws."""
+
+    def __init__(self, num_chains, dim):
+        self.count = 0
+        self.chain_mean = np.zeros((num_chains, dim))
+        self.chain_m2 = np.zeros((num_chains, dim))
+
+    def update(self, block):
+        """Add a (b, K, d) block of draws (b iterations of every chain)."""
+        b = len(block)
+        if not b:
+            return
+        block_mean = block.mean(axis=0)
+        delta = block_mean - self.chain_mean
+        total = self.count + b
+        self.chain_m2 += ((block - block_mean)**2).sum(axis=0) + delta**2 * self.count * b / total
+        self.chain_mean += delta * b / total
+        self.count = total
+
+    @property
+    def chain_var(self):
+        return self.chain_m2 / max(self.count - 1, 1)
+
+    @property
+    def mean(self):
+        return self.chain_mean.mean(axis=0)
+
+    @property
+    def std(self):
+        """Standard deviation of all draws pooled (ddof 0, like chain.std())."""
+        pooled_m2 = self.chain_m2.sum(axis=0) + self.count * ((self.chain_mean - self.mean)**2).sum(axis=0)
+        return np.sqrt(pooled_m2 / (self.count * len(self.chain_mean)))
+
+
+def running_mean_path(out):
+    """File next to the draws file where rwmh(out=...) writes the running mean."""
+    return os.path.splitext(out)[0] + ".running_mean.npy"
+
+
+def rwmh(log_post, initial, num_iterations, step=STEP, seed=None, cov=None, thin=1, out=None,
+         chunk_size=CHUNK_SIZE):
+    """
+    Run K chains in lockstep from the (K, d) starting points.
+
+    log_post must accept a (K, d) array and return the K log densities. Proposals are
+    current + step * z with z ~ N(0, cov) (identity when cov is None).
+
+    Draws go through a buffer of chunk_size iterations: every full buffer updates the
+    online moments and the running totals, and its iterations 0, thin, 2 * thin, ... are
+    written, with the running mean over all chains at those iterations, to the output:
+    - out=None: in-memory arrays,
+    - out="draws.npy": .npy files (draws.npy and draws.running_mean.npy), written chunk
+      by chunk through memory maps (np.load(path, mmap_mode="r") reads them back
+      without loading them),
+    - out=False: nothing is kept, only the summaries.
+    RAM then depends on chunk_size and K, not on num_iterations (except for out=None).
+
+    Returns a dict with the draws (shape (K, ceil(num_iterations / thin), d), starting
+    points first), the acceptance rate of each chain, the mean and std of all draws
+    (every iteration, before thinning), the per-chain means and variances, and the
+    running mean at the kept iterations (shape (ceil(num_iterations / thin), d)); draws
+    and running mean are None with out=False.
+    """
+    rng = np.random.default_rng(seed)
+    current = np.array(initial, dtype=float, ndmin=2)
+    num_chains, dim = current.shape
+    current_log_post = log_post(current)
+    chol = np.eye(dim) if cov is None else np.linalg.cholesky(cov)
+
+    kept = (num_iterations + thin - 1) // thin
+    if out is None:
+        chains = np.empty((num_chains, kept, dim))
+        running_mean = np.empty((kept, dim))
+    elif out is False:
+        chains = running_mean = None
+    else:
+        chains = np.lib.format.open_memmap(out, mode="w+", dtype=np.float64, shape=(num_chains, kept, dim))
+        running_mean = np.lib.format.open_memmap(running_mean_path(out), mode="w+", dtype=np.float64,
+                                                 shape=(kept, dim))
+    moments = OnlineMoments(num_chains, dim)
+    total = np.zeros(dim)  # Sum of all draws so far, for the running mean
+
+    chunk_size = max(chunk_size - chunk_size % thin, thin)  # Chunks start on the thinning grid
+    buffer = np.empty((chunk_size, num_chains, dim))
+    accepted = np.zeros(num_chains)
+
+    def flush(first, size):
+        block = buffer[:size]
+        moments.update(block)
+        sums = total + np.cumsum(block.sum(axis=1), axis=0)
+        total[:] = sums[-1]
+        if chains is not None:
+            rows = slice(first // thin, (first + size + thin - 1) // thin)
+            running_mean[rows] = sums[::thin] / (num_chains * np.arange(first + 1, first + size + 1, thin))[:, None]
+            chains[:, rows] = block[::thin].transpose(1, 0, 2)
+
+    buffer[0] = current
+    for i in range(1, num_iterations):
+        proposal = current + step * rng.standard_normal((num_chains, dim)) @ chol.T
+        proposal_log_post = log_post(proposal)
+        accept = np.log(rng.uniform(size=num_chains)) < proposal_log_post - current_log_post
+        current[accept] = proposal[accept]
+        current_log_post[accept] = proposal_log_post[accept]
+        accepted += accept
+        if i % chunk_size == 0:
+            flush(i - chunk_size, chunk_size)
+        buffer[i % chunk_size] = current
+    flush(num_iterations - 1 - (num_iterations - 1) % chunk_size, (num_iterations - 1) % chunk_size + 1)
+
+    if isinstance(chains, np.memmap):
+        chains.flush()
+        running_mean.flush()
+    return {"chains": chains, "acceptance": accepted / max(num_iterations - 1, 1),
+            "mean": moments.mean, "std": moments.std, "chain_mean": moments.chain_mean,
+            "chain_var": moments.chain_var, "running_mean": running_mean}
+
+
+def adaptive_rwmh(log_post, initial, num_iterations, warmup=2000, target=TARGET_ACCEPTANCE, seed=None, **options):
+    """
+    Adaptive Metropolis: learn the proposal during warm-up, then run rwmh() with it frozen.
+
+    During warm-up the proposal covariance is the running covariance of all chains'
+    states (plus a small jitter) and the scale starts at 2.38 / sqrt(d) and moves by
+    Robbins-Monro steps t^-0.6 * (acceptance - target) on the log scale.
+    Returns rwmh()'s dict for the num_iterations draws after warm-up (options such as
+    thin and out are passed on), with the frozen "step" and "cov" and the warm-up
+    acceptance rate.
+    """
+    rng = np.random.default_rng(seed)
+    current = np.array(initial, dtype=float, ndmin=2)
+    num_chains, dim = current.shape
+    current_log_post = log_post(current)
+
+    # Pooled running mean and sum of squared deviations of the states (Chan's batch update)
+    count, mean = num_chains, current.mean(axis=0)
+    m2 = (current - mean).T @ (current - mean)
+    log_step = np.log(2.38 / np.sqrt(dim))
+    jitter = 1e-6 * np.eye(dim)
+    cov = np.eye(dim)
+    accepted = 0.0
+
+    for t in range(1, warmup + 1):
+        if count > 10 * dim:
+            cov = m2 / (count - 1) + jitter
+        proposal = current + np.exp(log_step) * rng.standard_normal((num_chains, dim)) @ np.linalg.cholesky(cov).T
+        proposal_log_post = log_post(proposal)
+        accept = np.log(rng.uniform(size=num_chains)) < proposal_log_post - current_log_post
+        current[accept] = proposal[accept]
+        current_log_post[accept] = proposal_log_post[accept]
+        accepted += accept.mean()
+
+        log_step += t ** -0.6 * (accept.mean() - target)
+        batch_mean = current.mean(axis=0)
+        delta = batch_mean - mean
+        batch_m2 = (current - batch_mean).T @ (current - batch_mean)
+        m2 = m2 + batch_m2 + np.outer(delta, delta) * count * num_chains / (count + num_chains)
+        mean = mean + delta * num_chains / (count + num_chains)
+        count += num_chains
+
+    result = rwmh(log_post, current, num_iterations, np.exp(log_step), rng, cov, **options)
+    result.update(step=float(np.exp(log_step)), cov=cov, warmup_acceptance=accepted / max(warmup, 1))
+    return result
+
+
+def _rwmh_job(args):
+    return rwmh(*args)
+
+
+def run_chains(log_post, initial, num_iterations, step=STEP, seed=None, workers=1, thin=1, keep=True):
+    """
+    rwmh() with the chains split in groups over a process pool.
+
+    Each group gets its own child seed, so the result depends on seed and workers but
+    not on scheduling. log_post must be picklable (a module-level function). The draws
+    come back from the workers in memory (keep=False: only the summaries).
+    """
+    initial = np.array(initial, dtype=float, ndmin=2)
+    workers = min(workers or 1, len(initial))
+    out = None if keep else False
+    if workers == 1:
+        return rwmh(log_post, initial, num_iterations, step, seed, thin=thin, out=out)
+
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    jobs = [(log_post, group, num_iterations, step, child, None, thin, out)
+            for group, child in zip(np.array_split(initial, workers), seeds)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_rwmh_job, jobs))
+
+    # Pool the per-group summaries, weighting by the number of chains
+    sizes = np.array([len(r["chain_mean"]) for r in results])
+    chain_mean = np.concatenate([r["chain_mean"] for r in results])
+    chain_var = np.concatenate([r["chain_var"] for r in results])
+    mean = chain_mean.mean(axis=0)
+    pooled_m2 = ((chain_var * max(num_iterations - 1, 1)).sum(axis=0)
+                 + num_iterations * ((chain_mean - mean)**2).sum(axis=0))
+    return {"chains": np.concatenate([r["chains"] for r in results]) if keep else None,
+            "acceptance": np.concatenate([r["acceptance"] for r in results]),
+            "mean": mean, "std": np.sqrt(pooled_m2 / (num_iterations * len(chain_mean))),
+            "chain_mean": chain_mean, "chain_var": chain_var,
+            "running_mean": (sum(size * r["running_mean"] for size, r in zip(sizes, results)) / sizes.sum()
+                             if keep else None)}
+
+
+def _split(chains):
+    # (K, n, d) -> (2K, n // 2, d): first and second half of every chain (middle draw dropped if n is odd)
+    half = chains.shape[1] // 2
+    return np.concatenate([chains[:, :half], chains[:, chains.shape[1] - half:]])
+
+
+def split_rhat(chains):
+    """Split-R-hat per parameter for draws of shape (K, n, d)."""
+    split = _split(np.asarray(chains, dtype=float))
+    n = split.shape[1]
+    within = split.var(axis=1, ddof=1).mean(axis=0)
+    between = n * split.mean(axis=1).var(axis=0, ddof=1)
+    var_plus = (n - 1) / n * within + between / n
+    return np.sqrt(var_plus / within)
+
+
+def _autocovariance(x):
+    # Autocovariance at every lag along the last axis, via FFT (biased, divided by n)
+    n = x.shape[-1]
+    size = 2 ** int(np.ceil(np.log2(2 * n)))
+    centered = x - x.mean(axis=-1, keepdims=True)
+    spectrum = np.fft.rfft(centered, size, axis=-1)
+    return np.fft.irfft(spectrum * np.conj(spectrum), size, axis=-1)[..., :n] / n
+
+
+def ess(chains):
+    """Effective sample size per parameter for draws of shape (K, n, d)."""
+    split = _split(np.asarray(chains, dtype=float))
+    m, n, _ = split.shape
+    acov = _autocovariance(np.transpose(split, (2, 0, 1)))  # (d, m, n)
+
+    within = acov[:, :, 0].mean(axis=1) * n / (n - 1)
+    between = n * split.mean(axis=1).var(axis=0, ddof=1)
+    var_plus = (n - 1) / n * within + between / n
+    rho = 1 - (within[:, None] - acov.mean(axis=1)) / var_plus[:, None]
+    rho[:, 0] = 1.0
+
+    # Geyer: sum pairs of autocorrelations while they stay positive, forced non-increasing
+    pairs = rho[:, :n - n % 2].reshape(len(rho), -1, 2).sum(axis=2)
+    positive = np.cumprod(pairs > 0, axis=1).astype(bool)
+    pairs = np.minimum.accumulate(np.where(positive, pairs, 0), axis=1)
+    tau = -1 + 2 * pairs.sum(axis=1)
+    return m * n / np.maximum(tau, 1 / np.log10(m * n))
+
+
+def summary(chains):
+    """Posterior mean, std, split-R-hat and ESS per parameter, pooling all chains."""
+    chains = np.asarray(chains, dtype=float)
+    pooled = chains.reshape(-1, chains.shape[-1])
+    return {"mean": pooled.mean(axis=0), "std": pooled.std(axis=0),
+            "rhat": split_rhat(chains), "ess": ess(chains)}
+
+
+def benchmark(log_post, initial, num_iterations, warmup=2000, seed=None):
+    """ESS per second of the fixed-step sampler against adaptive_rwmh (warm-up time included)."""
+    rows = []
+    for name in ("fixed", "adaptive"):
+        start = time.perf_counter()
+        if name == "fixed":
+            result = rwmh(log_post, initial, warmup + num_iterations, seed=seed)
+            result["chains"] = result["chains"][:, warmup:]
+        else:
+            result = adaptive_rwmh(log_post, initial, num_iterations, warmup, seed=seed)
+        elapsed = time.perf_counter() - start
+        effective = ess(result["chains"])
+        rows.append({"sampler": name, "seconds": elapsed, "acceptance": float(result["acceptance"].mean()),
+                     "ess": effective, "ess_per_second": effective / elapsed})
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Batched RWMH on the repulsive-grid posterior")
+    parser.add_argument("--chains", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--benchmark", action="store_true", help="ESS/s of the fixed step against adaptive_rwmh")
+    parser.add_argument("--warmup", type=int, default=2000)
+    parser.add_argument("--thin", type=int, default=1, help="keep one draw every THIN iterations")
+    parser.add_argument("--out", help=".npy file for the kept draws (written in chunks, single process)")
+    parser.add_argument("--no-keep", action="store_true", help="keep no draws, only the online summaries")
+    args = parser.parse_args()
+
+    # Overdispersed starting points around the grid
+    initial = np.random.default_rng(args.seed).uniform(-4, 4, size=(args.chains, 2))
+    if args.benchmark:
+        for row in benchmark(log_posterior, initial, args.iterations, args.warmup, args.seed):
+            print(f"{row['sampler']:>8}: {row['seconds']:.2f} s, acceptance {row['acceptance']:.2f}, "
+                  f"ESS {np.round(row['ess'])}, ESS/s {np.round(row['ess_per_second'], 1)}")
+        raise SystemExit
+    start = time.perf_counter()
+    if args.out:
+        result = rwmh(log_posterior, initial, args.iterations, seed=args.seed, thin=args.thin, out=args.out)
+    else:
+        result = run_chains(log_posterior, initial, args.iterations, seed=args.seed, workers=args.workers,
+                            thin=args.thin, keep=not args.no_keep)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.chains} chains x {args.iterations} iterations in {elapsed:.2f} s, "
+          f"acceptance {result['acceptance'].mean():.2f}")
+    print(f"online mean: {np.round(result['mean'], 3)}, std: {np.round(result['std'], 3)} (all iterations)")
+    if result["chains"] is None:
+        raise SystemExit
+    stats = summary(result["chains"][:, result["chains"].shape[1] // 2:])  # second half, after warm-up
+    for name, values in stats.items():
+        print(f"{name:>5}: {np.round(values, 3)}")
+    print(f"ESS/s: {np.round(stats['ess'] / elapsed, 1)}")
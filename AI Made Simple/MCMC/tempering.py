@@ -0,0 +1,148 @@
+import time
+
+import numpy as np
+
+from rwmh import STEP, ess, log_posterior, rwmh, split_rhat
+
+# Parallel tempering (replica exchange) for the repulsive-grid posterior of rwmh.py.
+#
+# Every chain is a set of T replicas at inverse temperatures 1 = beta_0 > ... > beta_T-1,
+# each sampling log_posterior * beta with a random walk (hot replicas use a larger step,
+# step / sqrt(beta), so they cross the repulsive points easily). After every move,
+# neighbouring temperatures propose to exchange their states, accepted with probability
+#   min(1, exp((beta_t - beta_t+1) * (log p(x_t+1) - log p(x_t))))
+# Even and odd pairs alternate, so all exchanges of one iteration are independent and
+# done with array operations. K chains x T replicas are a (K, T, d) array evaluated in
+# one log_posterior call per iteration. Only the beta = 1 replica samples the posterior.
+#
+# Round trips measure how well states travel along the ladder: a walker (a state followed
+# through the exchanges) completes one when it goes from the coldest to the hottest
+# temperature and back.
+#
+#     python tempering.py                                  # PT against RWMH, ESS per second
+#     python tempering.py --temperatures 6 --max-temp 20
+
+NUM_TEMPERATURES = 4
+MAX_TEMPERATURE = 10.0
+
+
+def temperature_ladder(num_temperatures=NUM_TEMPERATURES, max_temperature=MAX_TEMPERATURE):
+    """Geometric ladder of inverse temperatures from 1 down to 1 / max_temperature."""
+    return max_temperature ** -np.linspace(0, 1, num_temperatures)
+
+
+def parallel_tempering(log_post, initial, num_iterations, betas=None, step=STEP, seed=None):
+    """
+    Run K chains of len(betas) replicas each; the replicas of a chain start at its (K, d) starting point.
+
+    Returns a dict with the draws of the beta = 1 replicas, shape (K, num_iterations, d),
+    the move acceptance rate per temperature, the exchange acceptance rate per pair of
+    neighbouring temperatures, the number of round trips and the round trips per walker
+    per 1000 iterations.
+    """
+    rng = np.random.default_rng(seed)
+    betas = temperature_ladder() if betas is None else np.asarray(betas, dtype=float)
+    initial = np.array(initial, dtype=float, ndmin=2)
+    num_chains, dim = initial.shape
+    num_temps = len(betas)
+    if num_temps < 2:
+        raise ValueError("parallel tempering needs at least 2 temperatures (use rwmh for a single one)")
+    chain_index = np.arange(num_chains)
+
+    current = np.repeat(initial[:, None], num_temps, axis=1)  # (K, T, d)
+    current_log_post = log_post(current)                       # (K, T)
+    steps = (step / np.sqrt(betas))[None, :, None]
+
+    # walker[k, t]: which walker is at temperature t of chain k; direction +1 after the
+    # coldest temperature, -1 after the hottest (0 before either)
+    walker = np.tile(np.arange(num_temps), (num_chains, 1))
+    direction = np.zeros((num_chains, num_temps), dtype=int)
+    round_trips = 0
+
+    chains = np.empty((num_chains, num_iterations, dim))
+    chains[:, 0] = initial
+    accepted = np.zeros(num_temps)
+    swaps = np.zeros(max(num_temps - 1, 0))
+    swap_tries = np.zeros(max(num_temps - 1, 0))
+
+    for i in range(1, num_iterations):
+        # Random-walk move of every replica
+        proposal = current + steps * rng.standard_normal((num_chains, num_temps, dim))
+        proposal_log_post = log_post(proposal)
+        accept = np.log(rng.uniform(size=(num_chains, num_temps))) < betas * (proposal_log_post - current_log_post)
+        current = np.where(accept[..., None], proposal, current)
+        current_log_post = np.where(accept, proposal_log_post, current_log_post)
+        accepted += accept.mean(axis=0)
+
+        # Exchanges between temperatures (t, t + 1), t even on even iterations and odd on odd ones
+        lower = np.arange(i % 2, num_temps - 1, 2)
+        if len(lower):
+            upper = lower + 1
+            log_ratio = (betas[lower] - betas[upper]) * (current_log_post[:, upper] - current_log_post[:, lower])
+            swap = np.log(rng.uniform(size=log_ratio.shape)) < log_ratio
+            for values in (current, current_log_post, walker):
+                low, up = values[:, lower].copy(), values[:, upper].copy()
+                mask = swap.reshape(swap.shape + (1,) * (values.ndim - 2))
+                values[:, lower] = np.where(mask, up, low)
+                values[:, upper] = np.where(mask, low, up)
+            swaps[lower] += swap.mean(axis=0)
+            swap_tries[lower] += 1
+
+        # Round trips: a walker back at the coldest temperature after visiting the hottest one
+        cold, hot = walker[:, 0], walker[:, -1]
+        round_trips += np.count_nonzero(direction[chain_index, cold] == -1)
+        direction[chain_index, cold] = 1
+        hot_direction = direction[chain_index, hot]
+        direction[chain_index, hot] = np.where(hot_direction == 1, -1, hot_direction)
+
+        chains[:, i] = current[:, 0]
+
+    moves = max(num_iterations - 1, 1)
+    return {"chains": chains, "acceptance": accepted / moves,
+            "swap_acceptance": swaps / np.maximum(swap_tries, 1), "round_trips": int(round_trips),
+            "round_trip_rate": 1000 * round_trips / (num_chains * num_temps * moves)}
+
+
+def compare(log_post, initial, num_iterations, betas=None, seed=None):
+    """ESS per second of the beta = 1 draws of parallel tempering against plain RWMH with as many chains."""
+    start = time.perf_counter()
+    plain = rwmh(log_post, initial, num_iterations, seed=seed)
+    plain_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    tempered = parallel_tempering(log_post, initial, num_iterations, betas, seed=seed)
+    tempered_seconds = time.perf_counter() - start
+
+    half = num_iterations // 2  # Second half, after warm-up
+    rows = []
+    for name, result, seconds in (("rwmh", plain, plain_seconds), ("tempering", tempered, tempered_seconds)):
+        draws = result["chains"][:, half:]
+        effective = ess(draws)
+        rows.append({"sampler": name, "seconds": seconds, "mean": draws.reshape(-1, draws.shape[-1]).mean(axis=0),
+                     "rhat": split_rhat(draws), "ess": effective, "ess_per_second": effective / seconds})
+    rows[1]["speedup"] = rows[1]["ess_per_second"] / rows[0]["ess_per_second"]
+    return rows, tempered
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel tempering against RWMH on the repulsive-grid posterior")
+    parser.add_argument("--chains", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--temperatures", type=int, default=NUM_TEMPERATURES)
+    parser.add_argument("--max-temp", type=float, default=MAX_TEMPERATURE)
+    parser.add_argument("--seed", type=int, default=12345)
+    args = parser.parse_args()
+
+    initial = np.random.default_rng(args.seed).uniform(-4, 4, size=(args.chains, 2))
+    betas = temperature_ladder(args.temperatures, args.max_temp)
+    rows, tempered = compare(log_posterior, initial, args.iterations, betas, args.seed)
+
+    print(f"temperatures: {np.round(1 / betas, 2)}")
+    print(f"move acceptance per temperature: {np.round(tempered['acceptance'], 2)}")
+    print(f"swap acceptance per pair: {np.round(tempered['swap_acceptance'], 2)}")
+    print(f"round trips: {tempered['round_trips']} ({tempered['round_trip_rate']:.2f} per walker per 1000 iterations)")
+    for row in rows:
+        print(f"{row['sampler']:>9}: {row['seconds']:.2f} s, mean {np.round(row['mean'], 3)}, "
+              f"R-hat {np.round(row['rhat'], 3)}, ESS {np.round(row['ess'])}, ESS/s {np.round(row['ess_per_second'], 1)}")
+    print(f"ESS/s speed-up of tempering: {np.round(rows[1]['speedup'], 2)}")
@@ -0,0 +1,108 @@
+"""
+Archivio degli articoli in formato JSON Lines (un articolo per riga, solo in append).
+
+Salvare un nuovo articolo costa una singola scrittura in coda al file, seguita da
+fsync, invece di rileggere e riscrivere l'intero documento {"news": [...]}. Se lo
+script si interrompe a metà di una scrittura, al massimo l'ultima riga resta
+incompleta: viene scartata alla riapertura e il resto dell'archivio è intatto.
+
+Il notebook dell'Episodio 4 legge ancora il vecchio formato {"news": [...]}, che si
+ottiene con export_news() oppure da riga di comando:
+
+    python article_store.py LaStampa/LaStampa.jsonl LaStampa/LaStampa.json
+"""
+import json
+import os
+import sys
+
+
+###############################################################
+# Lettura e scrittura
+def load_articles(path):
+    """Legge gli articoli da un archivio .jsonl o da un vecchio file {"news": [...]}."""
+    if not os.path.exists(path):
+        return []
+
+    if not path.endswith(".jsonl"):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("news", [])
+        except json.JSONDecodeError:
+            return []
+
+    articles = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # Riga finale troncata da una scrittura interrotta
+            if line.strip():
+                articles.append(json.loads(line))
+    return articles
+
+
+def write_atomic(path, text):
+    """Scrive un file passando da un file temporaneo, così non resta mai a metà."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def export_news(store_path, json_path):
+    """Esporta l'archivio nel formato {"news": [...]} usato dal notebook dell'Episodio 4."""
+    data = {"news": load_articles(store_path)}
+    write_atomic(json_path, json.dumps(data, ensure_ascii=False, indent=4))
+    return len(data["news"])
+
+
+###############################################################
+# Archivio in append
+class ArticleStore:
+    """
+    Archivio .jsonl di una testata.
+
+    Alla prima apertura, se l'archivio non esiste ma c'è il vecchio file JSON
+    (legacy_path), gli articoli già salvati vengono importati una volta sola.
+    """
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        if not os.path.exists(path) and legacy_path and os.path.exists(legacy_path):
+            articles = load_articles(legacy_path)
+            write_atomic(path, "".join(json.dumps(a, ensure_ascii=False) + "\n" for a in articles))
+        self._repair()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _repair(self):
+        # Tronca un'eventuale ultima riga incompleta lasciata da un'interruzione
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def append(self, news_dict):
+        """Aggiunge un articolo in coda all'archivio con una sola scrittura."""
+        self._file.write(json.dumps(news_dict, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def __iter__(self):
+        return iter(load_articles(self.path))
+
+    def export(self, json_path):
+        return export_news(self.path, json_path)
+
+    def close(self):
+        self._file.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python article_store.py <archivio.jsonl> <uscita.json>")
+        sys.exit(1)
+    count = export_news(sys.argv[1], sys.argv[2])
+    print(f"Esportati {count} articoli in {sys.argv[2]}")
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark di remove_indent / remove_refuses: versioni originali degli script
+contro quelle di textnorm.py, sugli archivi salvati (LaStampa.json, Repubblica.json).
+
+Per ogni articolo viene ricostruito un testo di pagina realistico: intestazione,
+marcatore di inizio, corpo con a capo e tabulazioni, marcatore di fine e footer.
+Viene provata anche la variante con gli escape scritti per esteso (come nel repr
+di bytes), che è il caso in cui remove_indent deve davvero sostituire qualcosa.
+
+    python bench_textnorm.py
+"""
+import json
+import os
+import re
+import time
+
+from textnorm import remove_indent, remove_refuses
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPORA = ["LaStampa/LaStampa.json", "Repubblica/Repubblica.json"]
+REPEAT = 5
+
+POPUP_START = "minuti di lettura"
+POPUP_END = "Leggi i commenti"
+HEADER = "Menu Cerca Abbonati Accedi Esteri Politica Economia Sport Cronaca \n\t " * 40
+FOOTER = " Leggi anche \n Altri articoli \t Redazione Contatti Privacy " * 40
+
+
+###############################################################
+# Versioni originali degli script
+def remove_indent_old(text):
+    text = text.replace(r"\n", " ").replace(r"\r", " ").replace(r"\'", "'").replace(r"\t", " ").replace(r"\"", "'")
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def remove_refuses_old(base_text, start, end):
+    text = re.sub(r'^.*?' + re.escape(start), start, base_text, flags=re.DOTALL)
+    text = re.sub(r'(' + re.escape(end) + r').*', r'\1', text, flags=re.DOTALL)
+    return text
+
+
+###############################################################
+# Costruzione degli input
+def load_pages():
+    pages = []
+    for corpus in CORPORA:
+        with open(os.path.join(BASE_DIR, corpus), "r", encoding="utf-8") as f:
+            for item in json.load(f)["news"]:
+                body = item["Content"].replace(". ", ".\n\t  ")
+                pages.append(HEADER + POPUP_START + "\n" + body + "\n" + POPUP_END + FOOTER)
+    return pages
+
+
+def bench(function, inputs):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        outputs = [function(*args) for args in inputs]
+        best = min(best, time.perf_counter() - start)
+    return best, outputs
+
+
+def report(name, old, new, inputs):
+    old_time, old_out = bench(old, inputs)
+    new_time, new_out = bench(new, inputs)
+    identical = sum(a == b for a, b in zip(old_out, new_out))
+    print(f"{name:<28} vecchia {old_time * 1000:8.1f} ms   nuova {new_time * 1000:8.1f} ms   "
+          f"speedup {old_time / new_time:5.1f}x   output identici {identical}/{len(inputs)}")
+    return identical == len(inputs)
+
+
+if __name__ == "__main__":
+    pages = load_pages()
+    escaped = [str(page.encode("utf-8"))[2:-1] for page in pages]  # escape letterali \n, \t, \'
+    normalized = [remove_indent_old(page) for page in pages]
+    print(f"{len(pages)} pagine, {sum(map(len, pages)) / 1e6:.1f} milioni di caratteri\n")
+
+    ok = report("remove_indent", remove_indent_old, remove_indent, [(p,) for p in pages])
+    ok &= report("remove_indent (escape)", remove_indent_old, remove_indent, [(p,) for p in escaped])
+    ok &= report("remove_refuses", remove_refuses_old, remove_refuses,
+                 [(p, POPUP_START, POPUP_END) for p in normalized])
+    ok &= report("remove_refuses (no fine)", remove_refuses_old, remove_refuses,
+                 [(p, POPUP_START, "marcatore assente") for p in normalized])
+    print("\nOK: output identici" if ok else "\nATTENZIONE: output diversi")
@@ -0,0 +1,32 @@
+"""
+Crawl di tutte le testate (o solo di quelle indicate) in un unico processo.
+
+    python crawl_all.py                      # Corriere, La Stampa e Repubblica in parallelo
+    python crawl_all.py Corriere LaStampa    # solo alcune testate
+    python crawl_all.py --quiet              # nessuna stampa, solo il record in TimeReport.jsonl
+    python crawl_all.py --incremental        # scarica solo gli URL mai controllati (vedi frontier.py)
+    python crawl_all.py --skip-near-duplicates   # non salva i quasi duplicati di altri articoli (near_duplicates.py)
+"""
+import argparse
+
+from engine import run
+from sources import SOURCES
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl delle testate configurate in sources.py")
+    parser.add_argument("sources", nargs="*", metavar="testata",
+                        help=f"testate da scaricare ({', '.join(SOURCES)}); di default tutte")
+    parser.add_argument("-q", "--quiet", action="store_true", help="non stampa nulla durante il crawl")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="scarta prima del download gli URL già presenti nella frontiera")
+    parser.add_argument("--skip-near-duplicates", action="store_true",
+                        help="non salva gli articoli quasi identici a uno già archiviato (di qualsiasi testata)")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.sources if name not in SOURCES]
+    if unknown:
+        parser.error(f"testate sconosciute: {', '.join(unknown)}")
+
+    names = args.sources or list(SOURCES)
+    run([SOURCES[name] for name in names], quiet=args.quiet, incremental=args.incremental,
+        skip_near_duplicates=args.skip_near_duplicates)
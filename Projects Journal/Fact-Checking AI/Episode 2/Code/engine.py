@@ -0,0 +1,338 @@
+"""
+Motore di scraping unico per tutte le testate.
+
+Ogni testata è descritta da un profilo (sottoclasse di SourceProfile, vedi
+sources.py): sito, sezioni, regole sui link, marcatori di inizio e fine articolo,
+frasi che segnalano il paywall. Il motore esegue per ogni profilo le stesse fasi
+dei vecchi script:
+
+    1. scarica le homepage delle sezioni ed estrae i link agli articoli
+    2. scarica i link candidati e scarta quelli già salvati (link o titolo)
+    3. estrae il testo degli articoli nuovi e li aggiunge all'archivio
+
+Più testate vengono elaborate in parallelo nello stesso processo e condividono
+pool di connessioni, cache HTTP, indice dei link già visti e indice dei quasi
+duplicati (near_duplicates.py). L'analisi HTML (readability + BeautifulSoup) gira
+in un pool di processi, così i download non restano fermi dietro al parsing e il
+parsing usa tutti i core. Tempi e contatori
+di ogni fase finiscono in TimeReport.jsonl (vedi metrics.py).
+
+    run([CORRIERE, LA_STAMPA])      # da codice
+    python crawl_all.py             # da riga di comando
+"""
+import asyncio
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+from readability import Document  # pip install readability-lxml
+
+from article_store import ArticleStore
+from fetcher import Fetcher
+from frontier import Frontier
+from http_cache import ResponseCache
+from metrics import Metrics, append_records
+from near_duplicates import NearDuplicateIndex, minhash
+from seen_index import SeenIndex
+from textnorm import remove_indent, remove_refuses, trim_to_last_sentence
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DB = os.path.join(BASE_DIR, "crawl_state.sqlite")  # Indice dei link salvati e frontiera
+QUEUE_SIZE = 64  # Pagine scaricate in attesa di estrazione (limita la memoria)
+
+
+###############################################################
+# Profilo di una testata
+class SourceProfile:
+    """
+    Descrizione dichiarativa di una testata. I valori di default seguono La Stampa
+    e Repubblica (link assoluti, articolo tra "minuti di lettura" e "Leggi i commenti");
+    le testate con regole diverse ridefiniscono i metodi necessari.
+    """
+
+    name = None             # Valore del campo "Source" e chiave nel TimeReport
+    folder = None           # Cartella con archivio .jsonl ed export .json
+    site = None             # Radice del sito, senza "/" finale
+    tags = []               # Sotto homepage da cui estrarre i link
+    popup_start = "minuti di lettura"
+    popup_end = "Leggi i commenti"
+    skip = ["/diretta/", "/video/"]  # Frammenti di URL da scartare prima del download
+    paywall = []            # Frasi nel testo che indicano un articolo riservato
+    teaser = []             # Frasi in testa al contenuto che indicano un'anteprima
+    teaser_window = 15      # Quanti caratteri iniziali controllare per le anteprime
+
+    @property
+    def store_path(self):
+        return os.path.join(BASE_DIR, self.folder, self.folder + ".jsonl")
+
+    @property
+    def news_path(self):
+        return os.path.join(BASE_DIR, self.folder, self.folder + ".json")
+
+    def section_url(self, tag):
+        return self.site + "/" + tag + "/"
+
+    def match_links(self, tag, hrefs):
+        """Link della homepage che appartengono alla sezione tag."""
+        tags_pattern = '|'.join(self.tags)
+        pattern = rf'^https?://[^/]+/({tags_pattern})/'
+        links = []
+        for link in hrefs:
+            match = re.search(pattern, link)
+            if match and match.group(1) == tag and link.endswith('/'):
+                links.append(link)
+        return links
+
+    def keep_link(self, link):
+        """False per i link da non scaricare affatto (dirette, video, ...)."""
+        return not any(fragment in link for fragment in self.skip)
+
+    def extract_news(self, link, text_only):
+        """Ritaglia il corpo dell'articolo dal testo della pagina."""
+        news = remove_refuses(text_only, self.popup_start, self.popup_end)
+        if len(news) > len(self.popup_start) and len(news) > len(self.popup_end):
+            news = news[len(self.popup_start)+1:len(news)-len(self.popup_end)]
+        return trim_to_last_sentence(news)
+
+    def scraping(self, link, doc):
+        """Dizionario dell'articolo a partire dal Document già analizzato, o None se va scartato."""
+        rawText = doc.content()
+        title = doc.short_title()
+
+        # Estrazione della data (current date)
+        date = datetime.now().strftime("%Y-%m-%d")
+
+        # Rimuove tutti gli elementi HTML e i caratteri non conformi
+        text_only = remove_indent(BeautifulSoup(rawText, 'html.parser').get_text())
+        title = remove_indent(title)
+
+        if any(sentence in text_only for sentence in self.paywall):
+            return None
+
+        news_dict = {
+            "Title": title,
+            "Source": self.name,
+            "Date": date,
+            "Link": link,
+            "Content": self.extract_news(link, text_only).strip()
+        }
+
+        if any(sentence in news_dict["Content"][:self.teaser_window] for sentence in self.teaser):
+            return None
+
+        return news_dict
+
+
+###############################################################
+# Fasi del crawl (le funzioni eseguite nel pool di processi stanno a livello di modulo)
+def parse_homepage(profile, tag, content):
+    homepage = Document(content)
+    rawText = homepage.content()
+
+    # Sostituzione caratteri non conformi e solo elementi cliccabili
+    soup = BeautifulSoup(remove_indent(rawText), 'html.parser')
+    hrefs = [link.get('href') for link in soup.find_all('a') if link.get('href')]
+    return profile.match_links(tag, hrefs)
+
+
+def extract_article(profile, link, content):
+    """
+    Analizza la pagina una sola volta: titolo per il controllo duplicati, articolo estratto,
+    firma MinHash ed eventuale errore. Gli errori di analisi (es. readability su una pagina
+    vuota) tornano come testo: le eccezioni di lxml non si possono rimandare dal pool di processi.
+    """
+    try:
+        doc = Document(content)
+        news_dict = profile.scraping(link, doc)
+        signature = minhash(news_dict["Content"]) if news_dict is not None else None
+        return remove_indent(doc.short_title()), news_dict, signature, None
+    except Exception as error:
+        return None, None, None, f"{type(error).__name__}: {error}"
+
+
+async def crawl(profile, fetcher, pool, consumers, metrics, incremental=False, near_index=None,
+                skip_near_duplicates=False):
+    """
+    Esegue il crawl completo di una testata.
+
+    Download ed estrazione formano una pipeline produttore/consumatore: i download
+    riempiono una coda limitata, mentre i consumatori passano le pagine al pool di
+    processi e salvano gli articoli nuovi appena estratti.
+
+    In modalità incrementale gli URL già presenti nella frontiera con un esito
+    definitivo vengono scartati prima di scaricarli.
+
+    Con near_index ogni articolo nuovo viene confrontato con quelli di tutte le
+    testate: i quasi duplicati vengono registrati e, con skip_near_duplicates,
+    non salvati.
+    """
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+
+    def count_response(response):
+        if response.from_cache:
+            metrics.count("cache hit")
+        elif response.status is not None:
+            metrics.count("cache miss")
+        if not response.ok:
+            metrics.count("errori download")
+
+    # Estrazione dei link dalla homepage
+    async def download_homepage(tag):
+        with metrics.span("download homepage"):
+            response = await fetcher.fetch(profile.section_url(tag))
+        count_response(response)
+        if not response.ok:
+            metrics.log(f"Error fetching homepage {response.url}: {response.error}")
+            return []
+        with metrics.span("estrazione link"):
+            links = await loop.run_in_executor(pool, parse_homepage, profile, tag, response.content)
+        return [(tag, link) for link in links]
+
+    with metrics.span("estrazione totale"):  # Tutta la fase: download e analisi di ogni sezione
+        link_lists = await asyncio.gather(*(download_homepage(tag) for tag in profile.tags))
+    sections = {link: tag for links in reversed(link_lists) for tag, link in links}
+    filtered_links = list(sections)
+    metrics.count("link candidati", len(filtered_links))
+    metrics.log(f"fine estrazione link: {len(filtered_links)} link candidati")
+
+    store = ArticleStore(profile.store_path, legacy_path=profile.news_path)
+    seen_index = SeenIndex(profile.name, store.path, db_path=STATE_DB)
+    frontier = Frontier(profile.name, db_path=STATE_DB)
+
+    # Controllo dei link ed estrazione degli articoli (la frontiera ricorda anche gli esclusi)
+    excluded = {link: sections[link] for link in filtered_links if not profile.keep_link(link)}
+    filtered_links = [link for link in filtered_links if link not in excluded]
+    frontier.discover({link: sections[link] for link in filtered_links})
+    frontier.discover(excluded, status="escluso")
+
+    if incremental:
+        new_links = [link for link in filtered_links if not frontier.known(link) and not seen_index.seen(link)]
+        metrics.count("link già noti", len(filtered_links) - len(new_links))
+        filtered_links = new_links
+        metrics.log(f"modalità incrementale: {len(filtered_links)} link nuovi da scaricare")
+
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    check_started = {}  # link -> inizio del controllo, per lo span "controllo link"
+
+    def finish(link, status):
+        """Esito definitivo del controllo di un link: frontiera e durata complessiva del controllo."""
+        frontier.mark(link, sections[link], status)
+        metrics.observe("controllo link", check_started.pop(link))
+
+    async def download(link):
+        check_started[link] = time.perf_counter()
+        with metrics.span("download articolo"):
+            response = await fetcher.fetch(link)
+        count_response(response)
+        if not response.ok:
+            metrics.log(f"Error fetching link {link}: {response.error}")
+            finish(link, "errore")
+            return
+        # Link già salvato: inutile analizzare la pagina per leggerne il titolo
+        if seen_index.seen(link):
+            metrics.count("link già salvati")
+            finish(link, "salvato")
+            return
+        await queue.put((link, response.content))
+
+    async def produce():
+        await asyncio.gather(*(download(link) for link in filtered_links))
+        for _ in range(consumers):
+            await queue.put(None)
+
+    async def consume():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            link, content = item
+
+            try:
+                with metrics.span("estrazione"):
+                    rawTitle, news_dict, signature, error = await loop.run_in_executor(pool, extract_article,
+                                                                                       profile, link, content)
+            except Exception as exc:  # Es. pool di processi interrotto: si perde solo questo articolo
+                rawTitle, news_dict, signature, error = None, None, None, f"{type(exc).__name__}: {exc}"
+            if error is not None:
+                metrics.count("errori estrazione")
+                metrics.log(f"Error extracting link {link}: {error}")
+                finish(link, "errore")
+                continue
+            if seen_index.seen(link, rawTitle):
+                metrics.count("link già salvati")
+                finish(link, "duplicato")
+                continue
+            if news_dict is None:
+                metrics.count("articoli scartati")
+                finish(link, "scartato")
+                continue
+
+            if near_index is not None and signature is not None:  # None: testo troppo corto per confrontarlo
+                with metrics.span("quasi duplicati"):
+                    matches = near_index.query(signature, profile.name, link)
+                if matches:
+                    metrics.count("quasi duplicati")
+                    near_index.record(profile.name, link, matches)
+                    if skip_near_duplicates:
+                        finish(link, "duplicato")
+                        continue
+
+            with metrics.span("scrittura"):
+                store.append(news_dict)
+                seen_index.add(news_dict["Link"], news_dict["Title"])
+                seen_index.sync()
+                if near_index is not None and signature is not None:
+                    near_index.add(profile.name, link, signature)
+            finish(link, "salvato")
+            metrics.count("articoli salvati")
+
+    try:
+        with metrics.span("controllo totale"):
+            await asyncio.gather(produce(), *(consume() for _ in range(consumers)))
+        metrics.log(f"fine controllo link: {metrics.counters.get('articoli salvati', 0)} articoli nuovi")
+
+        # Esporta nel formato {"news": [...]} letto dal notebook dell'Episodio 4 (solo se è cambiato)
+        if metrics.counters.get("articoli salvati") or not os.path.exists(profile.news_path):
+            with metrics.span("export"):
+                store.export(profile.news_path)
+    finally:
+        store.close()
+        seen_index.close()
+        frontier.close()
+
+    metrics.observe("crawl", started)
+    metrics.log("fine script")
+
+
+async def crawl_sources(profiles, workers=None, quiet=False, incremental=False, skip_near_duplicates=False,
+                        **fetcher_options):
+    """Crawl in parallelo di più testate con pool di connessioni e di processi e cache condivisi."""
+    workers = workers or os.cpu_count() or 1
+    all_metrics = [Metrics(profile.name, quiet=quiet) for profile in profiles]
+    cache = ResponseCache(os.path.join(BASE_DIR, "http_cache"))
+    near_index = NearDuplicateIndex(STATE_DB)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            async with Fetcher(cache=cache, **fetcher_options) as fetcher:
+                await asyncio.gather(*(crawl(profile, fetcher, pool, workers, metrics, incremental, near_index,
+                                             skip_near_duplicates)
+                                       for profile, metrics in zip(profiles, all_metrics)))
+    finally:
+        cache.close()
+        near_index.close()
+        append_records(all_metrics)
+
+    if not quiet:
+        for metrics in all_metrics:
+            print(metrics.summary() + "\n")
+    return all_metrics
+
+
+def run(profiles, workers=None, quiet=False, incremental=False, skip_near_duplicates=False, **fetcher_options):
+    """Punto di ingresso sincrono usato dagli script delle singole testate."""
+    return asyncio.run(crawl_sources(profiles, workers=workers, quiet=quiet, incremental=incremental,
+                                     skip_near_duplicates=skip_near_duplicates, **fetcher_options))
@@ -0,0 +1,158 @@
+"""
+Motore di download asincrono condiviso dagli scraper di Corriere, La Stampa e Repubblica.
+
+Tutte le richieste passano da un unico pool di connessioni limitato, con un tetto
+di richieste contemporanee per ogni host e una pausa minima di cortesia tra due
+richieste consecutive allo stesso host.
+
+Uso tipico da uno script sincrono:
+
+    results = fetch_all(["https://www.corriere.it/esteri/", ...])
+    for result in results:
+        if result.ok:
+            doc = Document(result.content)
+
+Con una ResponseCache (http_cache.py) il fetcher invia richieste condizionali e,
+se il server risponde 304, restituisce il contenuto salvato in cache.
+
+Gli URL non sono vincolati ai siti reali: basta passare gli indirizzi di un server
+HTTP locale per provare gli scraper senza uscire dalla macchina.
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import aiohttp  # pip install aiohttp
+
+MAX_CONNECTIONS = 20    # Connessioni totali aperte nello stesso momento
+PER_HOST = 4            # Richieste contemporanee verso lo stesso host
+DELAY = 0.25            # Secondi minimi tra l'inizio di due richieste allo stesso host
+TIMEOUT = 20            # Timeout totale di una singola richiesta (secondi)
+USER_AGENT = "Mozilla/5.0 (compatible; FactCheckingAI/1.0)"
+
+
+###############################################################
+# Risultato di una richiesta
+class FetchResult:
+    """Esito di un download: contenuto e intestazioni oppure l'errore incontrato."""
+
+    def __init__(self, url, status=None, content=b"", headers=None, error=None, elapsed=0.0,
+                 from_cache=False):
+        self.url = url
+        self.status = status
+        self.content = content
+        self.headers = headers or {}
+        self.error = error
+        self.elapsed = elapsed
+        self.from_cache = from_cache  # True se il server ha risposto 304 e il corpo viene dalla cache
+
+    @property
+    def ok(self):
+        return self.error is None and self.status is not None and 200 <= self.status < 400
+
+    def __repr__(self):
+        return f"FetchResult({self.url!r}, status={self.status}, error={self.error!r})"
+
+
+###############################################################
+# Pool di download
+class Fetcher:
+    """
+    Client HTTP asincrono con pool limitato e regole di cortesia per host.
+
+    Va usato come context manager asincrono:
+
+        async with Fetcher() as fetcher:
+            results = await fetcher.fetch_many(urls)
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, per_host=PER_HOST, delay=DELAY,
+                 timeout=TIMEOUT, headers=None, cache=None):
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.delay = delay
+        self.timeout = timeout
+        self.headers = {"User-Agent": USER_AGENT}
+        if headers:
+            self.headers.update(headers)
+        self.cache = cache
+        self._session = None
+        self._host_slots = {}   # host -> semaforo delle richieste contemporanee
+        self._host_locks = {}   # host -> lock che serializza il calcolo della pausa
+        self._host_next = {}    # host -> primo istante utile per la prossima richiesta
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        self._session = None
+
+    async def _wait_turn(self, host):
+        # Riserva il prossimo slot libero per l'host e attende il proprio turno
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            start = max(now, self._host_next.get(host, now))
+            self._host_next[host] = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def fetch(self, url, headers=None):
+        """Scarica un singolo URL; gli errori vengono riportati nel risultato, mai sollevati."""
+        host = urlsplit(url).netloc
+        request_headers = dict(headers or {})
+        if self.cache is not None:
+            request_headers.update(self.cache.conditional_headers(url))
+
+        stale = False
+        slots = self._host_slots.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with slots:
+            await self._wait_turn(host)
+            start = time.perf_counter()
+            try:
+                async with self._session.get(url, headers=request_headers) as response:
+                    content = await response.read()
+                    if self.cache is not None:
+                        if response.status == 304:
+                            cached = self.cache.load(url)
+                            if cached is not None:
+                                self.cache.hits += 1
+                                return FetchResult(url, response.status, cached, dict(response.headers),
+                                                   elapsed=time.perf_counter() - start, from_cache=True)
+                            stale = True  # Voce sparita dalla cache: va riscaricata senza condizioni
+                        else:
+                            self.cache.misses += 1
+                            if response.status == 200:
+                                self.cache.store(url, content, response.headers)
+                    if not stale:
+                        result = FetchResult(url, response.status, content, dict(response.headers),
+                                             elapsed=time.perf_counter() - start)
+                        if response.status >= 400:
+                            result.error = f"{response.status} {response.reason} for url: {url}"
+                        return result
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return FetchResult(url, error=str(e) or type(e).__name__,
+                                   elapsed=time.perf_counter() - start)
+        return await self.fetch(url, headers)
+
+    async def fetch_many(self, urls):
+        """Scarica tutti gli URL in parallelo mantenendo l'ordine di ingresso."""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+
+###############################################################
+# Interfaccia sincrona per gli script
+def fetch_all(urls, **kwargs):
+    """Scarica una lista di URL in parallelo e restituisce i FetchResult nello stesso ordine."""
+    async def run():
+        async with Fetcher(**kwargs) as fetcher:
+            return await fetcher.fetch_many(urls)
+
+    return asyncio.run(run())
@@ -0,0 +1,112 @@
+"""
+Frontiera persistente degli URL incontrati sulle homepage di ogni testata.
+
+Per ogni URL la tabella frontier (nello stesso crawl_state.sqlite dell'indice dei
+link salvati) conserva la sezione in cui è comparso, quando è stato visto la prima
+volta su una homepage, quando è stato controllato l'ultima volta e l'esito dell'ultimo
+controllo:
+
+    visto       trovato sulla homepage, non ancora controllato
+    escluso     scartato dalle regole della testata (dirette, video, ...) senza scaricarlo
+    salvato     articolo aggiunto all'archivio
+    duplicato   titolo già presente tra gli articoli salvati
+    scartato    paywall o anteprima per abbonati
+    errore      download o analisi della pagina falliti: l'URL verrà riprovato al prossimo giro
+
+In modalità incrementale (crawl_all.py --incremental) gli URL già noti con esito
+definitivo vengono scartati prima di qualsiasi richiesta, e si scaricano solo
+quelli nuovi: un giro orario costa le homepage (spesso 304) e pochi articoli.
+
+Gli esiti si scrivono a blocchi (ogni FLUSH_EVERY controlli o FLUSH_INTERVAL secondi),
+così un crawl interrotto perde al massimo l'ultimo blocco.
+"""
+import sqlite3
+import time
+
+from seen_index import DB_PATH
+
+FINAL_STATUSES = ("salvato", "duplicato", "scartato")
+FLUSH_EVERY = 50       # Esiti in attesa oltre i quali si scrive su disco
+FLUSH_INTERVAL = 5.0   # Secondi massimi tra due scritture
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    source       TEXT NOT NULL,
+    url          TEXT NOT NULL,
+    section      TEXT,
+    first_seen   REAL NOT NULL,
+    last_checked REAL NOT NULL,
+    status       TEXT NOT NULL,
+    PRIMARY KEY (source, url)
+);
+CREATE INDEX IF NOT EXISTS frontier_section ON frontier (source, section);
+"""
+
+
+class Frontier:
+    """URL noti di una testata, caricati una volta per esecuzione; gli aggiornamenti si scrivono a blocchi."""
+
+    def __init__(self, source, db_path=DB_PATH):
+        self.source = source
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        rows = self.conn.execute("SELECT url, status FROM frontier WHERE source = ?", (source,)).fetchall()
+        self.status = dict(rows)
+        self._pending = {}  # url -> (sezione, esito, istante del controllo)
+        self._flushed = time.monotonic()
+
+    def __len__(self):
+        return len(self.status)
+
+    def known(self, url):
+        """True se l'URL ha già un esito definitivo e non va riscaricato."""
+        return self.status.get(url) in FINAL_STATUSES
+
+    def discover(self, links, status="visto"):
+        """
+        Registra gli URL trovati sulle homepage ({url: sezione}) con l'istante della scoperta;
+        gli URL già presenti restano come sono.
+        """
+        now = time.time()
+        rows = [(self.source, url, section, now, now, status) for url, section in links.items()
+                if url not in self.status]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO frontier (source, url, section, first_seen, last_checked, status) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (source, url) DO NOTHING",
+                rows,
+            )
+        for url in links:
+            self.status.setdefault(url, status)
+
+    def mark(self, url, section, status):
+        """Registra l'esito del controllo di un URL (scritto su disco a blocchi, vedi flush())."""
+        self.status[url] = status
+        self._pending[url] = (section, status, time.time())
+        if len(self._pending) >= FLUSH_EVERY or time.monotonic() - self._flushed >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        rows = [(self.source, url, section, checked, checked, status)
+                for url, (section, status, checked) in self._pending.items()]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO frontier (source, url, section, first_seen, last_checked, status) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, url) DO UPDATE SET "
+                "last_checked = excluded.last_checked, status = excluded.status",
+                rows,
+            )
+        self._pending = {}
+        self._flushed = time.monotonic()
+
+    def sections(self):
+        """Numero di URL e ultimo controllo per sezione, utile per capire quali sezioni si muovono."""
+        return self.conn.execute(
+            "SELECT section, COUNT(*), MAX(last_checked) FROM frontier WHERE source = ? GROUP BY section",
+            (self.source,),
+        ).fetchall()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,121 @@
+"""
+Cache su disco delle risposte HTTP, con richieste condizionali.
+
+Per ogni URL scaricato che espone ETag o Last-Modified la cache conserva il corpo
+della risposta e i due validatori. Alla richiesta successiva il fetcher invia
+If-None-Match / If-Modified-Since: se la pagina non è cambiata il server risponde
+304 senza corpo e il contenuto viene letto dalla cache.
+
+La cache ha una dimensione massima: quando viene superata si eliminano le voci
+usate meno di recente (LRU). I conteggi hits/misses finiscono nel TimeReport.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+
+CACHE_DIR = "http_cache"
+MAX_BYTES = 200 * 1024 * 1024  # 200 MB
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url           TEXT PRIMARY KEY,
+    key           TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    size          INTEGER NOT NULL,
+    last_used     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+"""
+
+
+class ResponseCache:
+    """Cache LRU limitata in dimensione, indicizzata per URL."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, "index.sqlite"))
+        self.conn.executescript(SCHEMA)
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def conditional_headers(self, url):
+        """Intestazioni If-None-Match / If-Modified-Since per l'URL, se in cache."""
+        row = self.conn.execute("SELECT etag, last_modified FROM entries WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return {}
+        headers = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def load(self, url):
+        """Corpo salvato per l'URL (dopo un 304), oppure None se la voce è sparita."""
+        row = self.conn.execute("SELECT key FROM entries WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._body_path(row[0]), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            self.discard(url)
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE entries SET last_used = ? WHERE url = ?", (time.time(), url))
+        return content
+
+    def store(self, url, content, headers):
+        """Salva una risposta 200 se il server ha fornito almeno un validatore."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        if len(content) > self.max_bytes:
+            return
+
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        with open(self._body_path(key), "wb") as f:
+            f.write(content)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (url, key, etag, last_modified, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, key, etag, last_modified, len(content), time.time()),
+            )
+        self._evict()
+
+    def discard(self, url):
+        row = self.conn.execute("SELECT key FROM entries WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+        try:
+            os.remove(self._body_path(row[0]))
+        except FileNotFoundError:
+            pass
+
+    def size(self):
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        # Elimina le voci usate meno di recente finché la cache rientra nel limite
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        for url, size in self.conn.execute("SELECT url, size FROM entries ORDER BY last_used").fetchall():
+            self.discard(url)
+            excess -= size
+            if excess <= 0:
+                break
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,266 @@
+"""
+Metriche del crawl: span per fase, istogrammi a memoria limitata, un record per esecuzione.
+
+Sostituisce record_time e la riscrittura completa di TimeReport.json:
+
+- ogni fase della pipeline (download homepage, estrazione link, download articolo,
+  estrazione, scrittura, ...) è uno span con nome; le durate finiscono in un
+  istogramma a bucket logaritmici (8 per ottava, errore relativo < 5%), quindi la
+  memoria non cresce con il numero di link controllati;
+- alla fine di ogni esecuzione viene accodata una riga per testata a
+  TimeReport.jsonl, senza rileggere né riscrivere lo storico;
+- in modalità quiet non viene stampato nulla durante il crawl.
+
+Riepilogo con p50/p95/p99 per testata e fase, direttamente dai report salvati
+(il vecchio TimeReport.json viene letto come storico):
+
+    python metrics.py
+    python metrics.py TimeReport.jsonl --last 24
+"""
+import argparse
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_PATH = os.path.join(BASE_DIR, "TimeReport.jsonl")
+LEGACY_REPORT_PATH = os.path.join(BASE_DIR, "TimeReport.json")
+
+BUCKETS_PER_OCTAVE = 8
+MIN_VALUE = 1e-6  # Durate sotto il microsecondo finiscono nel primo bucket
+
+# Chiavi del vecchio TimeReport.json e span del motore che misurano la stessa cosa, così
+# lo storico finisce nello stesso istogramma solo quando i tempi sono confrontabili:
+# "estrazione totale" è l'intera fase delle homepage (una volta per esecuzione, come la
+# vecchia "Estrazione"), "controllo link" va dal download del link al suo esito,
+# "controllo totale" è l'intera fase dei link. "Fine" (script sequenziale di una sola
+# testata, dall'inizio alla fine) non ha un equivalente nel crawl parallelo e resta a parte.
+LEGACY_SPANS = {
+    "Estrazione": "estrazione totale",
+    "Singolo controllo": "controllo link",
+    "Controllo totale": "controllo totale",
+    "Fine": "legacy fine",
+}
+
+
+###############################################################
+# Istogramma
+class Histogram:
+    """Conteggi per bucket logaritmici più count, somma, minimo e massimo esatti."""
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets = {}
+
+    @staticmethod
+    def bucket(value):
+        if value <= MIN_VALUE:
+            return 0
+        return int(math.log2(value / MIN_VALUE) * BUCKETS_PER_OCTAVE) + 1
+
+    @staticmethod
+    def bucket_value(index):
+        # Punto medio geometrico del bucket
+        if index == 0:
+            return MIN_VALUE
+        return MIN_VALUE * 2 ** ((index - 0.5) / BUCKETS_PER_OCTAVE)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        index = self.bucket(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+    def percentile(self, q):
+        """Percentile approssimato (q tra 0 e 100), limitato a [min, max]."""
+        if not self.count:
+            return math.nan
+        rank = q / 100 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self.bucket_value(index), self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {"count": self.count, "sum": self.sum, "min": self.min, "max": self.max,
+                "buckets": {str(index): count for index, count in sorted(self.buckets.items())}}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.count = data["count"]
+        histogram.sum = data["sum"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        histogram.buckets = {int(index): count for index, count in data["buckets"].items()}
+        return histogram
+
+
+###############################################################
+# Metriche di un'esecuzione
+class Span:
+    """Durate di una fase e finestra di attività, per la velocità in elementi/s."""
+
+    def __init__(self, name):
+        self.name = name
+        self.histogram = Histogram()
+        self.first = None   # Inizio del primo elemento
+        self.last = None    # Fine dell'ultimo elemento
+
+    def add(self, started, ended):
+        self.histogram.observe(ended - started)
+        self.first = started if self.first is None else min(self.first, started)
+        self.last = ended if self.last is None else max(self.last, ended)
+
+    def wall(self):
+        return (self.last - self.first) if self.first is not None else 0.0
+
+    def throughput(self):
+        wall = self.wall()
+        return self.histogram.count / wall if wall > 0 else 0.0
+
+    def __str__(self):
+        h = self.histogram
+        return (f"{self.name}: {h.count} in {self.wall():.2f} s ({self.throughput():.1f}/s, "
+                f"p50 {h.percentile(50) * 1000:.1f} ms, p95 {h.percentile(95) * 1000:.1f} ms)")
+
+
+class Metrics:
+    """Span e contatori di una testata per una singola esecuzione."""
+
+    def __init__(self, source, quiet=False):
+        self.source = source
+        self.quiet = quiet
+        self.spans = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+        self.run = datetime.now().isoformat(timespec="seconds")
+
+    def span_stats(self, name):
+        if name not in self.spans:
+            self.spans[name] = Span(name)
+        return self.spans[name]
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.span_stats(name).add(started, time.perf_counter())
+
+    def observe(self, name, started, ended=None):
+        self.span_stats(name).add(started, time.perf_counter() if ended is None else ended)
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def log(self, message):
+        if not self.quiet:
+            print(f"[{self.source}] {message}")
+
+    def summary(self):
+        lines = [f"[{self.source}] {span}" for span in self.spans.values()]
+        lines += [f"[{self.source}] {name}: {value}" for name, value in self.counters.items()]
+        return "\n".join(lines)
+
+    def to_record(self):
+        return {
+            "run": self.run,
+            "source": self.source,
+            "spans": {name: span.histogram.to_dict() for name, span in self.spans.items()},
+            "throughput": {name: span.throughput() for name, span in self.spans.items()},
+            "counters": self.counters,
+        }
+
+
+def append_records(metrics_list, path=REPORT_PATH):
+    """Accoda una riga per testata al report, senza toccare le esecuzioni precedenti."""
+    with open(path, "a", encoding="utf-8") as f:
+        for metrics in metrics_list:
+            f.write(json.dumps(metrics.to_record(), ensure_ascii=False) + "\n")
+
+
+###############################################################
+# Lettura dei report e riepilogo
+def load_records(path=REPORT_PATH):
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.endswith("\n") and line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+def load_legacy(path=LEGACY_REPORT_PATH):
+    """Istogrammi per testata e span ricavati dalle liste del vecchio TimeReport.json."""
+    histograms = {}
+    if not os.path.exists(path):
+        return histograms
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            return histograms
+    for source, series in data.items():
+        for key, span in LEGACY_SPANS.items():
+            for value in series.get(key, []):
+                histograms.setdefault((source, span), Histogram()).observe(value)
+    return histograms
+
+
+def summarize(records, legacy=None, last=None):
+    """Unisce gli istogrammi per (testata, span), eventualmente solo sulle ultime esecuzioni."""
+    histograms = {key: value for key, value in (legacy or {}).items()}
+    if last is not None:
+        by_source = {}
+        for record in records:
+            by_source.setdefault(record["source"], []).append(record)
+        records = [r for source_records in by_source.values() for r in source_records[-last:]]
+        histograms = {}
+    for record in records:
+        for span, data in record["spans"].items():
+            histograms.setdefault((record["source"], span), Histogram()).merge(Histogram.from_dict(data))
+    return histograms
+
+
+def print_summary(histograms):
+    print(f"{'Testata':<12} {'Span':<20} {'n':>7} {'media':>10} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for (source, span), h in sorted(histograms.items()):
+        print(f"{source:<12} {span:<20} {h.count:>7} {h.mean():>10.4f} "
+              f"{h.percentile(50):>10.4f} {h.percentile(95):>10.4f} {h.percentile(99):>10.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Percentili p50/p95/p99 (secondi) per testata e fase")
+    parser.add_argument("report", nargs="?", default=REPORT_PATH, help="file TimeReport.jsonl")
+    parser.add_argument("--legacy", default=LEGACY_REPORT_PATH, help="vecchio TimeReport.json da includere")
+    parser.add_argument("--no-legacy", action="store_true", help="ignora il vecchio TimeReport.json")
+    parser.add_argument("--last", type=int, help="solo le ultime N esecuzioni di ogni testata (esclude lo storico)")
+    args = parser.parse_args()
+
+    legacy = None if args.no_legacy else load_legacy(args.legacy)
+    print_summary(summarize(load_records(args.report), legacy, args.last))
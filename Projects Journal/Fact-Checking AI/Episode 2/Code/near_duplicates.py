@@ -0,0 +1,240 @@
+"""
+Riconoscimento dei quasi duplicati tra tutte le testate (shingle + MinHash-LSH).
+
+Il controllo dei duplicati del motore è esatto e per singola testata (stesso link o
+stesso titolo): un lancio d'agenzia ripreso da Corriere, La Stampa e Repubblica con
+piccole modifiche passa tre volte. Qui ogni articolo viene ridotto a:
+
+- l'insieme dei suoi shingle, le sequenze di SHINGLE_SIZE parole consecutive del
+  Content (minuscolo, solo parole); sotto MIN_SHINGLES shingle (testi vuoti o di
+  poche parole) l'articolo non viene firmato né confrontato, perché firme così
+  povere renderebbero "quasi duplicati" tutti i testi corti;
+- una firma MinHash di NUM_PERM valori, con cui la similarità di Jaccard tra due
+  articoli si stima confrontando le firme;
+- BANDS bucket LSH, uno per ogni banda di ROWS valori della firma: due articoli con
+  Jaccard s finiscono nello stesso bucket di almeno una banda con probabilità
+  1 - (1 - s^ROWS)^BANDS (0.998 per s = 0.8, 0.08 per s = 0.4).
+
+Un articolo nuovo si confronta quindi solo con gli articoli che condividono almeno
+un bucket (BANDS ricerche su indice SQLite), non con tutto l'archivio. Firme, bucket
+e coppie trovate stanno nello stesso crawl_state.sqlite di seen_index e frontier.
+
+Nel motore ogni articolo estratto viene confrontato prima della scrittura: i quasi
+duplicati vengono registrati (e con crawl_all.py --skip-near-duplicates non salvati).
+Gli archivi già esistenti si indicizzano una volta con la passata batch, che poi
+aggiunge solo gli articoli mancanti:
+
+    python near_duplicates.py                     # indicizza gli articoli mancanti e stampa le coppie
+    python near_duplicates.py --rebuild           # ricostruisce l'indice da zero
+    python near_duplicates.py --threshold 0.7 --out quasi_duplicati.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+
+import numpy as np
+
+SHINGLE_SIZE = 5
+BANDS = 20
+ROWS = 6
+NUM_PERM = BANDS * ROWS
+THRESHOLD = 0.8  # Jaccard stimata oltre la quale due articoli sono quasi duplicati
+MIN_SHINGLES = 10  # Shingle minimi per firmare un articolo
+
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240501)  # Seme fisso: le firme salvate restano confrontabili
+_A = _rng.integers(1, (1 << 31) - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 31) - 1, NUM_PERM, dtype=np.uint64)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS minhash (
+    source    TEXT NOT NULL,
+    link      TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    PRIMARY KEY (source, link)
+);
+CREATE TABLE IF NOT EXISTS minhash_bands (
+    band   INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    link   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS minhash_bucket ON minhash_bands (band, bucket);
+CREATE INDEX IF NOT EXISTS minhash_bands_link ON minhash_bands (source, link);
+CREATE TABLE IF NOT EXISTS near_duplicates (
+    source     TEXT NOT NULL,
+    link       TEXT NOT NULL,
+    dup_source TEXT NOT NULL,
+    dup_link   TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    found      REAL NOT NULL,
+    PRIMARY KEY (source, link, dup_source, dup_link)
+);
+"""
+
+
+###############################################################
+# Shingle e firme
+def shingles(text):
+    """Hash a 31 bit delle sequenze di SHINGLE_SIZE parole del testo (nessuna se le parole sono meno)."""
+    words = re.findall(r"\w+", text.lower())
+    grams = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) & 0x7FFFFFFF for g in grams), dtype=np.uint64,
+                       count=len(grams))
+
+
+def minhash(text):
+    """Firma MinHash (NUM_PERM interi a 32 bit) del Content di un articolo, None se ha meno di MIN_SHINGLES shingle."""
+    values = shingles(text or "")
+    if len(values) < MIN_SHINGLES:
+        return None
+    # (a * x + b) mod p per tutte le permutazioni e tutti gli shingle: a, b, x < 2^31, nessun overflow
+    return ((_A[:, None] * values[None, :] + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_buckets(signature):
+    """Un bucket per banda: hash stabile (non quello di Python, che cambia a ogni processo)."""
+    return [int.from_bytes(hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(),
+                                           digest_size=8).digest(), "little", signed=True)
+            for band in range(BANDS)]
+
+
+def similarity(first, second):
+    """Jaccard stimata: frazione di valori uguali tra due firme."""
+    return float(np.mean(first == second))
+
+
+###############################################################
+# Indice persistente
+class NearDuplicateIndex:
+    """Firme e bucket LSH di tutte le testate, con le coppie di quasi duplicati trovate."""
+
+    def __init__(self, db_path, threshold=THRESHOLD):
+        self.threshold = threshold
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM minhash").fetchone()[0]
+
+    def indexed(self, source):
+        return {link for link, in self.conn.execute("SELECT link FROM minhash WHERE source = ?", (source,))}
+
+    def candidates(self, signature):
+        """Articoli che condividono almeno un bucket con la firma."""
+        found = set()
+        for band, bucket in enumerate(band_buckets(signature)):
+            found.update(self.conn.execute(
+                "SELECT source, link FROM minhash_bands WHERE band = ? AND bucket = ?", (band, bucket)
+            ).fetchall())
+        return found
+
+    def query(self, signature, source=None, link=None):
+        """[(testata, link, similarità)] dei quasi duplicati, dal più simile; esclude l'articolo stesso."""
+        matches = []
+        for other_source, other_link in self.candidates(signature):
+            if (other_source, other_link) == (source, link):
+                continue
+            row = self.conn.execute("SELECT signature FROM minhash WHERE source = ? AND link = ?",
+                                    (other_source, other_link)).fetchone()
+            score = similarity(signature, np.frombuffer(row[0], dtype=np.uint32))
+            if score >= self.threshold:
+                matches.append((other_source, other_link, score))
+        return sorted(matches, key=lambda match: -match[2])
+
+    def add(self, source, link, signature):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO minhash (source, link, signature) VALUES (?, ?, ?)",
+                              (source, link, signature.tobytes()))
+            self.conn.execute("DELETE FROM minhash_bands WHERE source = ? AND link = ?", (source, link))
+            self.conn.executemany(
+                "INSERT INTO minhash_bands (band, bucket, source, link) VALUES (?, ?, ?, ?)",
+                [(band, bucket, source, link) for band, bucket in enumerate(band_buckets(signature))],
+            )
+
+    def record(self, source, link, matches):
+        """Salva le coppie trovate per un articolo."""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO near_duplicates "
+                "(source, link, dup_source, dup_link, similarity, found) VALUES (?, ?, ?, ?, ?, ?)",
+                [(source, link, dup_source, dup_link, score, now) for dup_source, dup_link, score in matches],
+            )
+
+    def check(self, source, link, signature):
+        """Confronta un articolo nuovo con l'indice, registra le coppie e lo aggiunge all'indice."""
+        matches = self.query(signature, source, link)
+        if matches:
+            self.record(source, link, matches)
+        self.add(source, link, signature)
+        return matches
+
+    def pairs(self):
+        return self.conn.execute(
+            "SELECT source, link, dup_source, dup_link, similarity FROM near_duplicates ORDER BY similarity DESC"
+        ).fetchall()
+
+    def clear(self):
+        with self.conn:
+            for table in ("minhash", "minhash_bands", "near_duplicates"):
+                self.conn.execute(f"DELETE FROM {table}")
+
+    def close(self):
+        self.conn.close()
+
+
+###############################################################
+# Passata batch sugli archivi esistenti
+def index_corpora(index, profiles):
+    """Indicizza gli articoli di tutte le testate non ancora presenti; restituisce quanti ne ha aggiunti."""
+    from article_store import load_articles
+
+    added = 0
+    for profile in profiles:
+        done = index.indexed(profile.name)
+        path = profile.store_path if os.path.exists(profile.store_path) else profile.news_path
+        for item in load_articles(path):
+            if item["Link"] in done:
+                continue
+            signature = minhash(item.get("Content"))
+            if signature is None:  # Content vuoto o troppo corto
+                continue
+            index.check(profile.name, item["Link"], signature)
+            done.add(item["Link"])
+            added += 1
+    return added
+
+
+if __name__ == "__main__":
+    from engine import STATE_DB
+    from sources import SOURCES
+
+    parser = argparse.ArgumentParser(description="Quasi duplicati tra gli archivi di tutte le testate")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Jaccard stimata minima (vale per gli articoli indicizzati in questa passata)")
+    parser.add_argument("--rebuild", action="store_true", help="ricostruisce l'indice da zero")
+    parser.add_argument("--out", help="file JSON in cui salvare le coppie trovate")
+    args = parser.parse_args()
+
+    index = NearDuplicateIndex(STATE_DB, threshold=args.threshold)
+    if args.rebuild:
+        index.clear()
+    start = time.perf_counter()
+    added = index_corpora(index, SOURCES.values())
+    print(f"{added} articoli indicizzati in {time.perf_counter() - start:.2f} s ({len(index)} in totale)")
+
+    pairs = index.pairs()
+    for source, link, dup_source, dup_link, score in pairs:
+        print(f"{score:.2f}  [{source}] {link}\n      [{dup_source}] {dup_link}")
+    print(f"{len(pairs)} coppie di quasi duplicati")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump([{"Source": s, "Link": l, "Duplicate source": ds, "Duplicate link": dl, "Similarity": sc}
+                       for s, l, ds, dl, sc in pairs], f, ensure_ascii=False, indent=4)
+    index.close()
@@ -0,0 +1,93 @@
+"""
+Indice persistente dei link e dei titoli già salvati da ogni testata.
+
+L'indice vive in un piccolo database SQLite condiviso (crawl_state.sqlite) e viene
+caricato in due insiemi Python una sola volta per esecuzione: la domanda
+"l'articolo è già stato salvato?" costa quindi O(1) invece di rileggere e scorrere
+tutto il file JSON delle notizie per ogni link.
+
+Per restare allineato con il file delle notizie, l'indice ricorda dimensione e data
+di modifica del file al momento dell'ultima sincronizzazione. Se il file è cambiato
+da allora (modifica manuale, esecuzione interrotta) l'indice viene ricostruito
+leggendo l'archivio una volta sola.
+"""
+import os
+import sqlite3
+
+from article_store import load_articles
+
+DB_PATH = "crawl_state.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    source TEXT NOT NULL,
+    link   TEXT NOT NULL,
+    title  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seen_source ON seen (source);
+CREATE TABLE IF NOT EXISTS seen_sync (
+    source    TEXT PRIMARY KEY,
+    signature TEXT NOT NULL
+);
+"""
+
+
+class SeenIndex:
+    """Insiemi di link e titoli già presenti nel file delle notizie di una testata."""
+
+    def __init__(self, source, news_path, db_path=DB_PATH):
+        self.source = source
+        self.news_path = news_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+        if self._stored_signature() != self._signature():
+            self.rebuild()
+
+        rows = self.conn.execute("SELECT link, title FROM seen WHERE source = ?", (source,)).fetchall()
+        self.links = {link for link, _ in rows}
+        self.titles = {title for _, title in rows}
+
+    def __len__(self):
+        return len(self.links)
+
+    def _signature(self):
+        # Dimensione e data di modifica identificano lo stato del file delle notizie
+        try:
+            st = os.stat(self.news_path)
+        except FileNotFoundError:
+            return ""
+        return f"{st.st_size}:{st.st_mtime_ns}"
+
+    def _stored_signature(self):
+        row = self.conn.execute("SELECT signature FROM seen_sync WHERE source = ?", (self.source,)).fetchone()
+        return row[0] if row else None
+
+    def rebuild(self):
+        """Ricostruisce l'indice della testata leggendo l'archivio una sola volta."""
+        rows = [(self.source, item["Link"], item["Title"]) for item in load_articles(self.news_path)]
+        with self.conn:
+            self.conn.execute("DELETE FROM seen WHERE source = ?", (self.source,))
+            self.conn.executemany("INSERT INTO seen (source, link, title) VALUES (?, ?, ?)", rows)
+        self.sync()
+
+    def seen(self, link, title=None):
+        """True se il link o il titolo compaiono già tra le notizie salvate."""
+        return link in self.links or (title is not None and title in self.titles)
+
+    def add(self, link, title):
+        """Registra un articolo appena salvato nel file delle notizie."""
+        self.links.add(link)
+        self.titles.add(title)
+        with self.conn:
+            self.conn.execute("INSERT INTO seen (source, link, title) VALUES (?, ?, ?)",
+                              (self.source, link, title))
+
+    def sync(self):
+        """Allinea la firma salvata allo stato attuale del file delle notizie."""
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO seen_sync (source, signature) VALUES (?, ?)",
+                              (self.source, self._signature()))
+
+    def close(self):
+        self.conn.close()
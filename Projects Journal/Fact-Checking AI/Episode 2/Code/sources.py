@@ -0,0 +1,82 @@
+"""
+Profili delle testate gestite dal motore di scraping (engine.py).
+
+Per aggiungere un nuovo giornale basta una sottoclasse di SourceProfile con sito,
+sezioni e marcatori del testo, ridefinendo match_links / extract_news solo se il
+sito si comporta diversamente, e aggiungerla a SOURCES.
+"""
+import re
+
+from engine import SourceProfile
+from textnorm import remove_refuses, trim_to_last_sentence
+
+
+class Corriere(SourceProfile):
+    name = "Corriere"
+    folder = "Corriere"
+    site = "https://www.corriere.it"
+    tags = ["esteri", "politica", "economia", "sport", "cronache", "scuola", "salute"]
+    popup_start = "app Corriere News."
+    popup_end = "© RIPRODUZIONE RISERVATA"
+    city_popup_end = "Vai a tutte le notizie di"  # Le pagine locali chiudono con un altro footer
+    cities = ["roma", "milano"]
+    skip = []
+
+    def match_links(self, tag, hrefs):
+        # Il Corriere usa link relativi del tipo /tag/...
+        links = []
+        for link in hrefs:
+            match = re.search(r'^/([^/]+)/', link)
+            if match and match.group(1) == tag:
+                links.append(self.site + link)
+        return links
+
+    def extract_news(self, link, text_only):
+        if any(city in link for city in self.cities):
+            news = remove_refuses(text_only, self.popup_start, self.city_popup_end)
+            return news[len(self.popup_start)+1:len(news)-len(self.city_popup_end)]
+
+        news = remove_refuses(text_only, self.popup_start, self.popup_end)
+        news = news[len(self.popup_start)+1:len(news)-len(self.popup_end)]
+        return trim_to_last_sentence(news)
+
+
+class LaStampa(SourceProfile):
+    name = "La Stampa"
+    folder = "LaStampa"
+    site = "https://www.lastampa.it"
+    tags = ["esteri", "politica", "economia", "sport", "cronaca", "scuola", "salute"]
+    paywall = ["L'ascolto è riservato"]
+    teaser = ["bbonati", "Abbonati per"]
+    teaser_window = 15
+
+    def keep_link(self, link):
+        # Scarta anche i link troppo corti per essere un articolo
+        return super().keep_link(link) and len(link) > len(self.site) + 4
+
+
+class Repubblica(SourceProfile):
+    name = "Repubblica"
+    folder = "Repubblica"
+    site = "https://www.repubblica.it"
+    tags = ["esteri", "politica", "economia", "sport", "cronaca", "scuola", "salute"]
+    paywall = ["Abbonati per leggere anche"]
+    teaser = ["b' Abbonati Menu"]
+    teaser_window = 20
+
+    def extract_news(self, link, text_only):
+        start_index = text_only.find(self.popup_start)
+        end_index = text_only.find(self.popup_end)
+
+        if start_index != -1 and end_index != -1:
+            news = text_only[start_index + len(self.popup_start):end_index]
+        else:
+            news = text_only  # Fallback if popUpStart or popUpEnd are not found
+        return trim_to_last_sentence(news)
+
+
+CORRIERE = Corriere()
+LA_STAMPA = LaStampa()
+REPUBBLICA = Repubblica()
+
+SOURCES = {profile.folder: profile for profile in (CORRIERE, LA_STAMPA, REPUBBLICA)}
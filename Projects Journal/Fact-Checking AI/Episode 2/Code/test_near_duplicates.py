@@ -0,0 +1,37 @@
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+
+from near_duplicates import MIN_SHINGLES, SHINGLE_SIZE, NearDuplicateIndex, index_corpora, minhash
+
+LONG = " ".join(f"parola{i}" for i in range(60))
+
+
+def write_store(directory, name, contents):
+    path = os.path.join(directory, name + ".jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for i, content in enumerate(contents):
+            f.write(json.dumps({"Title": f"{name} {i}", "Link": f"{name}/{i}", "Content": content}) + "\n")
+    return SimpleNamespace(name=name, store_path=path, news_path=path)
+
+
+def test_empty_and_short_content_are_not_signed():
+    assert minhash("") is None
+    assert minhash(None) is None
+    assert minhash("Breve testo di poche parole.") is None
+    short = " ".join(f"parola{i}" for i in range(SHINGLE_SIZE + MIN_SHINGLES - 2))
+    assert minhash(short) is None
+    assert minhash(short + " ultima") is not None
+
+
+def test_short_and_empty_articles_are_not_near_duplicates():
+    with tempfile.TemporaryDirectory() as directory:
+        profiles = [write_store(directory, "Corriere", ["", "Solo tre parole", LONG]),
+                    write_store(directory, "Repubblica", ["", "Breve testo di poche parole.", LONG])]
+        index = NearDuplicateIndex(os.path.join(directory, "state.sqlite"))
+        assert index_corpora(index, profiles) == 2
+        # Solo gli articoli lunghi sono firmati: l'unica coppia è quella vera
+        assert [(s, l, ds, dl) for s, l, ds, dl, _ in index.pairs()] == [
+            ("Repubblica", "Repubblica/2", "Corriere", "Corriere/2")]
+        index.close()
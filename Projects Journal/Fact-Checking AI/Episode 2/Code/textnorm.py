@@ -0,0 +1,46 @@
+"""
+Normalizzazione del testo e ritaglio dei marcatori, condivisi da tutte le testate.
+
+Le due funzioni producono esattamente lo stesso risultato delle versioni originali
+degli script, ma in tempo lineare:
+
+- remove_indent sostituiva cinque sequenze di escape con altrettanti str.replace e
+  poi comprimeva gli spazi con re.sub(r'\\s+'). Ora le sequenze vengono cercate solo
+  se nel testo c'è almeno un backslash (quasi mai, per il testo estratto da
+  BeautifulSoup) e gli spazi si comprimono con split/join, che in Python usa la
+  stessa definizione di spazio di \\s.
+- remove_refuses compilava due regex DOTALL a ogni articolo, tra cui ^.*?start che
+  ritorna indietro lungo tutta la pagina. Ora bastano due str.find.
+
+bench_textnorm.py confronta le due versioni sugli archivi salvati.
+"""
+import re
+
+_QUOTES = re.compile(r"\\['\"]")     # \' e \" diventano un apice
+_BLANKS = re.compile(r"\\[nrt]")     # \n, \r e \t scritti per esteso diventano uno spazio
+
+
+def remove_indent(text):
+    """Sostituisce gli escape letterali (\\n, \\r, \\t, \\', \\") e comprime gli spazi."""
+    if "\\" in text:
+        text = _QUOTES.sub("'", text)
+        text = _BLANKS.sub(" ", text)
+    return " ".join(text.split())
+
+
+def remove_refuses(base_text, start, end):
+    """Scarta il testo prima della prima occorrenza di start e dopo la prima di end (marcatori inclusi)."""
+    start_index = base_text.find(start)
+    text = base_text[start_index:] if start_index != -1 else base_text
+    end_index = text.find(end)
+    if end_index != -1:
+        text = text[:end_index + len(end)]
+    return text
+
+
+def trim_to_last_sentence(news):
+    # Taglia il testo all'ultimo punto
+    last_dot_index = news.rfind(".")
+    if last_dot_index != -1:
+        news = news[:last_dot_index + 1]
+    return news
@@ -0,0 +1,315 @@
+"""
+Benchmark of the Context Analysis pipeline: notebook code against the vectorized modules.
+
+Stages (each timed for the notebook version and for the new one):
+
+    load          pd.read_json of the four sentence_diff files    vs ragged.load_all (read into memory,
+                                                                     and memory-mapped with a pass over the values)
+    mean          .apply(mean_ignore_none) on the concatenation   vs window_stats.ragged_mean
+    describe      (new only) count, mean, std, min, max and quartiles with window_stats
+    tag join      regex over Corriere.json + four merges + concat vs str.extract + one join on article
+    differences   calculate_all_differences (2-4, row by row)     vs window_compare (2-4, then all pairs)
+    tests         ols + levene + allpairtest / anova_oneway +     vs group_stats on one summary table
+                  Welch t-tests with multipletests
+
+Besides the real data (scale 1) the benchmark builds synthetic corpora with 10x and
+100x the articles, by repeating the real sequences with small noise (same lengths and
+None positions) and random tags; they are cached in bench_data/ and reused.
+
+Every stage reports the best wall time over --repeat runs and the peak memory traced
+by tracemalloc in a separate run. Pages of a memory-mapped file are not traced, so the
+memory-mapped load reports no peak (n/a): its memory is the page cache of the files it
+reads. Results are appended to bench_results.jsonl, and --compare shows the change
+against the previous run of the same stage.
+
+    python bench_pipeline.py                       # scales 1, 10, 100
+    python bench_pipeline.py --scales 1 10 --repeat 5 --compare
+    python bench_pipeline.py --scales 100 --no-baseline
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from statsmodels.formula.api import ols
+from statsmodels.stats.multicomp import MultiComparison
+from statsmodels.stats.multitest import multipletests
+from statsmodels.stats.oneway import anova_oneway
+
+from group_stats import anova, levene, pairwise_tests, summarize, welch_anova
+from ragged import RaggedArray, RaggedDataset, WINDOW_SIZES, load_all, ragged_path, save
+from window_compare import pairwise_differences
+from window_stats import ragged_mean, window_stats
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "bench_data")
+RESULTS_PATH = os.path.join(BASE_DIR, "bench_results.jsonl")
+TAGS = ["esteri", "salute", "politica", "scuola", "sport", "cronache", "economia"]
+TRANSLATION_MAP = {
+    'esteri': 'foreign',
+    'salute': 'health',
+    'politica': 'politics',
+    'scuola': 'school',
+    'sport': 'sports',
+    'cronache': 'chronicles',
+    'economia': 'economy'
+}
+
+
+###############################################################
+# Datasets
+def build_scaled(scale, directory, seed=0):
+    """sentence_diff JSON files, ragged copies and a Corriere.json with scale times the real articles."""
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    real = load_all(BASE_DIR)
+    n_articles = len(real[WINDOW_SIZES[0]]) * scale
+
+    for size, dataset in real.items():
+        metrics = {}
+        for name, array in dataset.metrics.items():
+            values = np.tile(np.asarray(array.values, dtype=np.float32), scale)
+            if scale > 1:
+                values += rng.normal(0, 0.01, len(values)).astype(np.float32)  # NaN stays NaN
+            offsets = np.zeros(n_articles + 1, dtype=np.int64)
+            np.cumsum(np.tile(array.lengths, scale), out=offsets[1:])
+            metrics[name] = RaggedArray(values, offsets)
+        scaled = RaggedDataset(size, metrics)
+        save(ragged_path(directory, size), scaled)
+        data = {"window_size": size}
+        data.update({name: array.to_lists() for name, array in metrics.items()})
+        with open(os.path.join(directory, f"sentence_diff_{size}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    tags = rng.choice(TAGS, n_articles)
+    news = [{"Title": f"Articolo {i}", "Source": "Corriere", "Date": "2024-10-01",
+             "Link": f"https://www.corriere.it/{tag}/24_ottobre_01/articolo-{i}.shtml", "Content": ""}
+            for i, tag in enumerate(tags)]
+    with open(os.path.join(directory, "Corriere.json"), "w", encoding="utf-8") as f:
+        json.dump({"news": news}, f)
+
+
+def dataset_dir(scale):
+    directory = os.path.join(DATA_DIR, f"scale_{scale}")
+    if not os.path.exists(os.path.join(directory, "Corriere.json")):
+        build_scaled(scale, directory)
+    return directory
+
+
+###############################################################
+# Notebook code
+def mean_ignore_none(lst):
+    filtered_list = [x for x in lst if x is not None]
+    return np.mean(filtered_list) if filtered_list else None
+
+
+def extract_tag_from_link(link):
+    match = re.search(r'corriere\.it/([^/]+)/', link)
+    if match:
+        return match.group(1)
+    return None
+
+
+def notebook_load(directory):
+    return {size: pd.read_json(os.path.join(directory, f"sentence_diff_{size}.json")) for size in WINDOW_SIZES}
+
+
+def notebook_mean(frames):
+    dftot = pd.concat(list(frames.values())).reset_index()
+    dftot["mean_euclidean_distance"] = dftot["euclidean_distance"].apply(mean_ignore_none)
+    return dftot
+
+
+def notebook_tag_join(directory, frames):
+    with open(os.path.join(directory, "Corriere.json"), 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    news_list = []
+    for item in data["news"]:
+        tag = extract_tag_from_link(item.get("Link", ""))
+        news_list.append({
+            "Tag": tag
+        })
+    df = pd.DataFrame(news_list)
+    df['Tag'] = df['Tag'].replace(TRANSLATION_MAP)
+    merged = [pd.merge(frame, df, left_index=True, right_index=True) for frame in frames.values()]
+    return pd.concat(merged).reset_index()
+
+
+def calculate_all_differences(row):
+    dist_2 = row[f'euclidean_distance_2']
+    dist_4 = row[f'euclidean_distance_4']
+
+    # Ensure both lists are of the same length by filling the shorter list with None
+    length = max(len(dist_2), len(dist_4))
+    dist_2 = dist_2 + [None] * (length - len(dist_2))
+    dist_4 = dist_4 + [None] * (length - len(dist_4))
+
+    # Calculate the differences and handle None values
+    differences = [
+        (d2 - d4) if d2 is not None and d4 is not None else None
+        for d2, d4 in zip(dist_2, dist_4)
+    ]
+
+    return differences
+
+
+def notebook_differences(frames):
+    renamed = [frame[["euclidean_distance"]].rename(columns={"euclidean_distance": f"euclidean_distance_{size}"})
+               for size, frame in frames.items()]
+    dfcomplete = renamed[0]
+    for frame in renamed[1:]:
+        dfcomplete = pd.merge(dfcomplete, frame, how="left", left_index=True, right_index=True)
+    return dfcomplete.apply(calculate_all_differences, axis=1)
+
+
+def notebook_tests(dftot):
+    data = []
+    groups = []
+    for size in WINDOW_SIZES:
+        group_data = dftot[dftot["window_size"] == size]["mean_euclidean_distance"].dropna()
+        data.append(group_data)
+        groups += [f'group_{size}'] * len(group_data)
+    dfANOVA = pd.DataFrame({'data': np.concatenate(data), 'group': groups})
+    ols('data ~ group', data=dfANOVA).fit()
+    stats.levene(*data)
+    mc = MultiComparison(dfANOVA['data'], dfANOVA['group'])
+    mc.allpairtest(lambda x, y: stats.ttest_ind(x, y), method='bonf')
+
+    tags = dftot["Tag"].unique()
+    by_tag = {tag: dftot[dftot["Tag"] == tag]["mean_euclidean_distance"].dropna() for tag in tags}
+    stats.levene(*by_tag.values())
+    anova_oneway(list(by_tag.values()), use_var="unequal")
+    p_values = [stats.ttest_ind(by_tag[a], by_tag[b], equal_var=False)[1] for a, b in itertools.combinations(tags, 2)]
+    multipletests(p_values, method='bonferroni')
+
+
+###############################################################
+# New modules
+def new_mean(datasets):
+    """Tidy (article, window_size, mean) frame, the counterpart of mean_euclidean_distance."""
+    return pd.concat([pd.DataFrame({"article": np.arange(len(dataset)), "window_size": size,
+                                    "mean": ragged_mean(dataset["euclidean_distance"])})
+                      for size, dataset in datasets.items()], ignore_index=True)
+
+
+def new_tag_join(directory, stats_df):
+    with open(os.path.join(directory, "Corriere.json"), 'r', encoding='utf-8') as file:
+        links = pd.Series([item.get("Link", "") for item in json.load(file)["news"]])
+    tags = links.str.extract(r'corriere\.it/([^/]+)/', expand=False).replace(TRANSLATION_MAP).rename("Tag")
+    return stats_df.join(tags, on="article")
+
+
+def new_tests(frame):
+    by_size = summarize(frame, "mean", "window_size")
+    anova(by_size), levene(by_size), pairwise_tests(by_size, equal_var=True)
+    by_tag = summarize(frame, "mean", "Tag")
+    levene(by_tag), welch_anova(by_tag), pairwise_tests(by_tag)
+
+
+###############################################################
+# Measurements
+def touch_values(datasets):
+    """Read every value of memory-mapped datasets (one reduction per metric)."""
+    for dataset in datasets.values():
+        for array in dataset.metrics.values():
+            np.nansum(array.values)
+    return datasets
+
+
+def measure(function, repeat, traced=True):
+    """Best wall time over repeat runs and peak traced memory of one more run (None if not traced)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    if not traced:
+        return best, None, function()
+    tracemalloc.start()
+    result = function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def run_scale(scale, repeat, baseline=True):
+    directory = dataset_dir(scale)
+    results = []
+
+    def stage(name, implementation, function, traced=True):
+        seconds, peak, result = measure(function, repeat, traced)
+        peak_mb = None if peak is None else peak / 1e6
+        results.append({"scale": scale, "stage": name, "impl": implementation,
+                        "seconds": seconds, "peak_mb": peak_mb})
+        memory = f"{peak_mb:10.1f} MB" if peak_mb is not None else f"{'n/a':>13}"
+        print(f"{scale:>5}x  {name:<12} {implementation:<11} {seconds:10.4f} s  {memory}")
+        return result
+
+    # Same work as pd.read_json: every value ends up in memory
+    datasets = stage("load", "ragged", lambda: load_all(directory, mmap=False))
+    # Opening the memory maps reads nothing: the timed run also sums every value
+    stage("load", "ragged-mmap", lambda: touch_values(load_all(directory)), traced=False)
+    stats_df = stage("mean", "ragged", lambda: new_mean(datasets))
+    stage("describe", "ragged", lambda: window_stats(datasets))
+    tagged = stage("tag join", "ragged", lambda: new_tag_join(directory, stats_df))
+    stage("differences", "ragged", lambda: pairwise_differences(datasets, pairs=[(2, 4)]))
+    stage("differences", "ragged-all", lambda: pairwise_differences(datasets))
+    stage("tests", "ragged", lambda: new_tests(tagged))
+
+    if baseline:
+        frames = stage("load", "notebook", lambda: notebook_load(directory))
+        stage("mean", "notebook", lambda: notebook_mean(frames))
+        dftot = stage("tag join", "notebook", lambda: notebook_tag_join(directory, frames))
+        dftot["mean_euclidean_distance"] = dftot["euclidean_distance"].apply(mean_ignore_none)
+        stage("differences", "notebook", lambda: notebook_differences(frames))
+        stage("tests", "notebook", lambda: notebook_tests(dftot))
+    return results
+
+
+def previous_results(path=RESULTS_PATH):
+    last = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    last[(record["scale"], record["stage"], record["impl"])] = record
+    return last
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the Context Analysis pipeline")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="corpus sizes (x 1152 articles)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (the best one is kept)")
+    parser.add_argument("--no-baseline", action="store_true", help="skip the notebook implementations")
+    parser.add_argument("--compare", action="store_true", help="compare with the previous run in bench_results.jsonl")
+    parser.add_argument("--out", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    previous = previous_results(args.out) if args.compare else {}
+    run = datetime.now().isoformat(timespec="seconds")
+    results = []
+    print(f"{'scale':>6}  {'stage':<12} {'impl':<11} {'wall':>12}  {'peak':>13}")
+    for scale in args.scales:
+        results += run_scale(scale, args.repeat, baseline=not args.no_baseline)
+
+    with open(args.out, "a", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps({"run": run, **result}) + "\n")
+
+    if previous:
+        print("\nChange against the previous run (time, memory):")
+        for result in results:
+            old = previous.get((result["scale"], result["stage"], result["impl"]))
+            if old:
+                memory = (f"{result['peak_mb'] / max(old['peak_mb'], 1e-9):6.2f}x"
+                          if result["peak_mb"] is not None and old["peak_mb"] is not None else f"{'n/a':>7}")
+                print(f"{result['scale']:>5}x  {result['stage']:<12} {result['impl']:<11} "
+                      f"{result['seconds'] / old['seconds']:6.2f}x  {memory}")
@@ -0,0 +1,181 @@
+"""
+Single-pass multi-window sentence embeddings for the Corriere articles.
+
+The sentence_diff_<w>.json files were built by embedding the sliding windows of
+2, 4, 6 and 8 sentences separately, so every sentence was embedded once per window
+it fell in. Here every sentence of every article is embedded exactly once; the
+window representations for any set of window sizes are then differences of
+cumulative sums over the sentence embeddings (the sum of the window, L2-normalized),
+and the euclidean_distance / dot_product sequences of all sizes come out of one pass.
+For a linear embedder such as the hashing stand-in this is exactly the embedding of
+the window text; for a transformer it is the usual mean pooling of sentence vectors.
+
+For an article with n sentences and window size w (h = w / 2), the value at the
+boundary between sentence i and i + 1 compares sentences i-h+1..i with i+1..i+h:
+the sequence has n - 1 entries, the first and last h - 1 are None, and an article
+with fewer than w sentences gives an empty list, as in the existing files.
+
+The embedder is any object with an embed(texts) -> (len(texts), dim) array method
+and a model_id (used by the embedding cache, see embedding_cache.py):
+
+    HashingEmbedder            deterministic local stand-in, no model download
+    SentenceTransformerEmbedder  wrapper around a sentence-transformers model
+
+    python embed_windows.py Corriere.json                    # hashing stand-in
+    python embed_windows.py Corriere.json --model <name>     # sentence-transformers
+    python embed_windows.py Corriere.json --ragged           # write .ragged directories too
+    python embed_windows.py Corriere.json --cache embedding_cache   # only embed new sentences
+"""
+import argparse
+import hashlib
+import json
+import re
+
+import numpy as np
+
+from embedding_cache import CachedEmbedder, EmbeddingCache
+from ragged import RaggedArray, RaggedDataset, WINDOW_SIZES, ragged_path, save
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+
+
+###############################################################
+# Embedders
+class HashingEmbedder:
+    """Hashed bag of words with fixed random signs: deterministic, dependency-free and linear in the text."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+        self.model_id = f"hashing-{dim}"
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float64)
+        for i, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                vectors[i, bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vectors
+
+
+class SentenceTransformerEmbedder:
+    """Any sentence-transformers model; imported lazily so the stand-in works without it."""
+
+    def __init__(self, model_name, batch_size=64):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.model_id = model_name
+        self.batch_size = batch_size
+
+    def embed(self, texts):
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+
+
+###############################################################
+# Windows from prefix sums
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def embed_sentences(articles, embedder):
+    """One embedder call over all sentences; returns (embeddings, sentence offsets per article)."""
+    sentences = [split_sentences(text) for text in articles]
+    offsets = np.zeros(len(sentences) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in sentences], out=offsets[1:])
+    flat = [sentence for article in sentences for sentence in article]
+    embeddings = np.asarray(embedder.embed(flat), dtype=np.float64) if flat else np.zeros((0, 1))
+    return embeddings, offsets
+
+
+def window_distances(embeddings, offsets, window_sizes=WINDOW_SIZES):
+    """{window_size: RaggedDataset} with euclidean_distance and dot_product for every article."""
+    prefix = np.zeros((len(embeddings) + 1, embeddings.shape[1]))
+    np.cumsum(embeddings, axis=0, out=prefix[1:])
+
+    counts = np.diff(offsets)
+    boundaries = np.maximum(counts - 1, 0)
+    articles = np.repeat(np.arange(len(counts)), boundaries)
+    boundary_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(boundaries, out=boundary_offsets[1:])
+    # Position i of the boundary inside its article and global index of sentence i + 1
+    position = np.arange(len(articles)) - boundary_offsets[articles]
+    split = offsets[articles] + position + 1
+
+    datasets = {}
+    for size in window_sizes:
+        half = size // 2
+        inside = (position - half + 1 >= 0) & (position + half <= counts[articles] - 1)
+        # Windows that fall outside the article read prefix[0] - prefix[0] and are masked below
+        left = normalize(prefix[np.where(inside, split, 0)] - prefix[np.where(inside, split - half, 0)])
+        right = normalize(prefix[np.where(inside, split + half, 0)] - prefix[np.where(inside, split, 0)])
+        dot = np.where(inside, np.einsum("ij,ij->i", left, right), np.nan)
+        distance = np.where(inside, np.linalg.norm(left - right, axis=1), np.nan)
+
+        # Articles shorter than the window have no sequence at all
+        keep = counts[articles] >= size
+        lengths = np.where(counts >= size, boundaries, 0)
+        size_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=size_offsets[1:])
+        datasets[size] = RaggedDataset(size, {
+            "euclidean_distance": RaggedArray(distance[keep].astype(np.float32), size_offsets),
+            "dot_product": RaggedArray(dot[keep].astype(np.float32), size_offsets),
+        })
+    return datasets
+
+
+def sliding_windows(embeddings, offsets, size):
+    """Unit vectors of every run of size consecutive sentences, with (article, first sentence) ids."""
+    prefix = np.zeros((len(embeddings) + 1, embeddings.shape[1]))
+    np.cumsum(embeddings, axis=0, out=prefix[1:])
+    counts = np.diff(offsets)
+    per_article = np.maximum(counts - size + 1, 0)
+    articles = np.repeat(np.arange(len(counts)), per_article)
+    starts = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(per_article, out=starts[1:])
+    first = np.arange(len(articles)) - starts[articles]
+    begin = offsets[articles] + first
+    return normalize(prefix[begin + size] - prefix[begin]), np.column_stack((articles, first))
+
+
+def load_contents(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [item["Content"] for item in json.load(f)["news"]]
+
+
+def write_json(dataset, path):
+    data = {"window_size": dataset.window_size}
+    data.update({name: array.to_lists() for name, array in dataset.metrics.items()})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Window distances for every window size from one embedding pass")
+    parser.add_argument("articles", help="file JSON {'news': [...]} with a Content field per article")
+    parser.add_argument("--model", help="sentence-transformers model (default: hashing stand-in)")
+    parser.add_argument("--windows", type=int, nargs="+", default=WINDOW_SIZES)
+    parser.add_argument("--out", default=".", help="output directory")
+    parser.add_argument("--ragged", action="store_true", help="also write the .ragged directories")
+    parser.add_argument("--cache", help="embedding cache directory (e.g. embedding_cache)")
+    args = parser.parse_args()
+
+    if any(size < 2 or size % 2 for size in args.windows):
+        parser.error("window sizes must be even and at least 2")
+    embedder = SentenceTransformerEmbedder(args.model) if args.model else HashingEmbedder()
+    if args.cache:
+        embedder = CachedEmbedder(embedder, EmbeddingCache(args.cache))
+    embeddings, offsets = embed_sentences(load_contents(args.articles), embedder)
+    for size, dataset in window_distances(embeddings, offsets, args.windows).items():
+        write_json(dataset, f"{args.out}/sentence_diff_{size}.json")
+        if args.ragged:
+            save(ragged_path(args.out, size), dataset)
+        print(f"window {size}: {len(dataset)} articles")
+    if args.cache:
+        print("cache:", embedder.cache.stats())
+        embedder.cache.close()
@@ -0,0 +1,181 @@
+"""
+Content-addressed cache of sentence embeddings.
+
+Every sentence is keyed by sha1(model id + whitespace-normalized text), so re-running
+the analysis after a scrape only embeds sentences that are new or were edited; an
+article that did not change costs a few index lookups. The vectors live in one
+memory-mapped float32 .npy file per model with a fixed number of slots
+(max_bytes / (4 * dim)); an SQLite index maps keys to slots and, once the store is
+full, the least recently used slots are overwritten.
+
+    from embed_windows import HashingEmbedder, embed_sentences
+    from embedding_cache import CachedEmbedder, EmbeddingCache
+
+    embedder = CachedEmbedder(HashingEmbedder(), EmbeddingCache("embedding_cache"))
+    embeddings, offsets = embed_sentences(contents, embedder)
+    print(embedder.cache.stats())    # hits, misses, hit rate, entries, bytes
+
+or from the command line: python embed_windows.py Corriere.json --cache embedding_cache
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+CACHE_DIR = "embedding_cache"
+MAX_BYTES = 256 * 1024 * 1024  # 256 MB of vectors per model
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key       TEXT PRIMARY KEY,
+    slot      INTEGER NOT NULL UNIQUE,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+"""
+
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+
+def content_key(model_id, text):
+    return hashlib.sha1(f"{model_id}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Fixed-size LRU stores of float32 vectors, one per model, indexed by content key."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = {}  # model id -> (connection, vectors memmap)
+        os.makedirs(directory, exist_ok=True)
+
+    def _model_dir(self, model_id):
+        return os.path.join(self.directory, re.sub(r"[^\w.-]+", "_", model_id))
+
+    def _open(self, model_id, dim=None):
+        """Index and vector file of a model; created on first store, when dim is known."""
+        if model_id in self.stores:
+            return self.stores[model_id]
+        path = self._model_dir(model_id)
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r+")
+        elif dim is None:
+            return None
+        else:
+            os.makedirs(path, exist_ok=True)
+            meta = {"model": model_id, "dim": dim, "slots": max(1, self.max_bytes // (4 * dim))}
+            # Sparse on disk until the slots are actually written
+            vectors = np.lib.format.open_memmap(os.path.join(path, "vectors.npy"), mode="w+",
+                                                dtype=np.float32, shape=(meta["slots"], dim))
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=4)
+        conn = sqlite3.connect(os.path.join(path, "index.sqlite"))
+        conn.executescript(SCHEMA)
+        self.stores[model_id] = (conn, vectors)
+        return self.stores[model_id]
+
+    @staticmethod
+    def _slots(conn, keys):
+        rows = []
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows += conn.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+        return dict(rows)
+
+    def get_many(self, model_id, keys):
+        """{key: vector} for the keys found in the cache; found entries become most recently used."""
+        store = self._open(model_id)
+        found = {}
+        if store is not None:
+            conn, vectors = store
+            slots = self._slots(conn, list(dict.fromkeys(keys)))
+            found = {key: np.array(vectors[slot]) for key, slot in slots.items()}
+            now = time.time()
+            with conn:
+                conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in slots])
+        hits = sum(key in found for key in keys)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, model_id, keys, embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        conn, vectors = self._open(model_id, embeddings.shape[1])
+        latest = dict(zip(keys, range(len(keys))))  # Last vector wins for repeated keys
+        slots = self._slots(conn, list(latest))     # Keys already stored are overwritten in place
+        new = [key for key in latest if key not in slots][-len(vectors):]
+
+        # Free slots first, then the slots of the least recently used entries
+        used = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        free = list(range(used, min(len(vectors), used + len(new))))
+        if len(new) > len(free):
+            oldest = conn.execute(
+                f"SELECT key, slot FROM entries WHERE key NOT IN ({','.join('?' * len(slots))}) "
+                "ORDER BY last_used LIMIT ?", (*slots, len(new) - len(free))
+            ).fetchall()
+            with conn:
+                conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in oldest])
+            free += [slot for _, slot in oldest]
+        slots.update(zip(new, free))
+
+        vectors[list(slots.values())] = embeddings[[latest[key] for key in slots]]
+        vectors.flush()
+        now = time.time()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                             [(key, slot, now) for key, slot in slots.items()])
+
+    def stats(self):
+        entries = 0
+        stored = 0
+        for conn, vectors in self.stores.values():
+            count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            entries += count
+            stored += count * vectors.shape[1] * 4
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "entries": entries, "bytes": stored}
+
+    def close(self):
+        for conn, vectors in self.stores.values():
+            vectors.flush()
+            conn.close()
+        self.stores = {}
+
+
+class CachedEmbedder:
+    """Wraps any embedder with an embed(texts) method and a model_id; only cache misses are embedded."""
+
+    def __init__(self, embedder, cache):
+        self.embedder = embedder
+        self.cache = cache
+        self.model_id = embedder.model_id
+
+    def embed(self, texts):
+        keys = [content_key(self.model_id, text) for text in texts]
+        found = self.cache.get_many(self.model_id, keys)
+
+        # Each distinct missing sentence is embedded once, in a single call
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            new = np.asarray(self.embedder.embed(list(missing.values())), dtype=np.float32)
+            self.cache.put_many(self.model_id, list(missing), new)
+            found.update(zip(missing, new))
+        if not texts:
+            return np.zeros((0, 1), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
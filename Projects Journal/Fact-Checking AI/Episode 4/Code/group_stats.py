@@ -0,0 +1,166 @@
+"""
+Grouped tests for the window-size and Tag analyses, computed from sufficient statistics.
+
+The notebook filters dftot by window size or Tag again for every test (ols, levene,
+anova_oneway, one ttest_ind per pair). Here one pass over the data builds, per group,
+
+    count, mean, M2 (sum of squared deviations), median
+    and the same count/mean/M2 of |x - mean| and |x - median|
+
+and every test is a few array operations on that small table:
+
+    anova(summary)              one-way ANOVA (the F test of ols('data ~ group'))
+    welch_anova(summary)        Welch's ANOVA (anova_oneway(..., use_var="unequal"))
+    levene(summary, center)     Levene (center="mean") / Brown-Forsythe (center="median", scipy's default)
+    pairwise_tests(summary)     all pairwise Welch (or pooled) t-tests with Bonferroni correction
+
+    summary = summarize(stats_df, "mean", by="window_size")
+    print(anova(summary), levene(summary))
+    print(pairwise_tests(summary, equal_var=True))
+
+Missing values are dropped, as the notebook did with .dropna().
+"""
+import itertools
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+TestResult = namedtuple("TestResult", ["statistic", "pvalue", "df_num", "df_den"])
+
+
+###############################################################
+# Sufficient statistics
+def _moments(values, codes, n_groups):
+    count = np.bincount(codes, minlength=n_groups)
+    mean = np.bincount(codes, weights=values, minlength=n_groups) / count
+    m2 = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=n_groups)
+    return count, mean, m2
+
+
+def summarize(frame, value, by):
+    """Per-group sufficient statistics of frame[value] grouped by frame[by], in one pass."""
+    data = frame[[by, value]].dropna()
+    codes, groups = pd.factorize(data[by], sort=True)
+    values = data[value].to_numpy(dtype=np.float64)
+    k = len(groups)
+
+    count, mean, m2 = _moments(values, codes, k)
+
+    # Medians from one sort by (group, value)
+    order = np.lexsort((values, codes))
+    ordered = values[order]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+    median = (ordered[starts + (count - 1) // 2] + ordered[starts + count // 2]) / 2
+
+    summary = pd.DataFrame({"count": count, "mean": mean, "m2": m2, "median": median},
+                           index=pd.Index(groups, name=by))
+    summary["var"] = np.divide(m2, count - 1, out=np.full(k, np.nan), where=count > 1)
+    for center, centers in (("mean", mean), ("median", median)):
+        _, z_mean, z_m2 = _moments(np.abs(values - centers[codes]), codes, k)
+        summary[f"absdev_{center}_mean"] = z_mean
+        summary[f"absdev_{center}_m2"] = z_m2
+    return summary
+
+
+def summarize_groups(groups):
+    """Same table from a list or dict of sequences, as passed to stats.levene(*groups)."""
+    if not isinstance(groups, dict):
+        groups = dict(enumerate(groups))
+    frame = pd.DataFrame({
+        "group": np.repeat(list(groups), [len(g) for g in groups.values()]),
+        "value": np.concatenate([np.asarray(g, dtype=np.float64) for g in groups.values()]),
+    })
+    return summarize(frame, "value", "group")
+
+
+###############################################################
+# Tests
+def _f_test(count, mean, m2):
+    k = len(count)
+    n = count.sum()
+    grand = (count * mean).sum() / n
+    between = (count * (mean - grand) ** 2).sum()
+    within = m2.sum()
+    statistic = (between / (k - 1)) / (within / (n - k))
+    return TestResult(statistic, stats.f.sf(statistic, k - 1, n - k), k - 1, n - k)
+
+
+def anova(summary):
+    """Classic one-way ANOVA."""
+    return _f_test(summary["count"].to_numpy(), summary["mean"].to_numpy(), summary["m2"].to_numpy())
+
+
+def levene(summary, center="median"):
+    """Levene's test on |x - center|: "median" is Brown-Forsythe, "mean" the original Levene."""
+    return _f_test(summary["count"].to_numpy(), summary[f"absdev_{center}_mean"].to_numpy(),
+                   summary[f"absdev_{center}_m2"].to_numpy())
+
+
+def welch_anova(summary):
+    """Welch's ANOVA for unequal variances."""
+    count = summary["count"].to_numpy()
+    mean = summary["mean"].to_numpy()
+    k = len(count)
+    weights = count / summary["var"].to_numpy()
+    total = weights.sum()
+    weighted_mean = (weights * mean).sum() / total
+    between = (weights * (mean - weighted_mean) ** 2).sum() / (k - 1)
+    correction = ((1 - weights / total) ** 2 / (count - 1)).sum()
+    statistic = between / (1 + 2 * (k - 2) / (k ** 2 - 1) * correction)
+    df_den = (k ** 2 - 1) / (3 * correction)
+    return TestResult(statistic, stats.f.sf(statistic, k - 1, df_den), k - 1, df_den)
+
+
+def pairwise_tests(summary, equal_var=False, alpha=0.05):
+    """All pairwise t-tests (Welch by default, pooled variance like ttest_ind otherwise), Bonferroni-corrected."""
+    pairs = list(itertools.combinations(range(len(summary)), 2))
+    first, second = np.array(pairs).T
+    count = summary["count"].to_numpy()
+    mean = summary["mean"].to_numpy()
+    var = summary["var"].to_numpy()
+    n1, n2 = count[first], count[second]
+    v1, v2 = var[first], var[second]
+
+    if equal_var:
+        df = n1 + n2 - 2
+        pooled = ((n1 - 1) * v1 + (n2 - 1) * v2) / df
+        se = np.sqrt(pooled * (1 / n1 + 1 / n2))
+    else:
+        a, b = v1 / n1, v2 / n2
+        se = np.sqrt(a + b)
+        df = (a + b) ** 2 / (a ** 2 / (n1 - 1) + b ** 2 / (n2 - 1))
+
+    diff = mean[first] - mean[second]
+    t = diff / se
+    pvalue = 2 * stats.t.sf(np.abs(t), df)
+    adjusted = np.minimum(pvalue * len(pairs), 1.0)
+    return pd.DataFrame({
+        "group1": summary.index[first],
+        "group2": summary.index[second],
+        "mean_diff": diff,
+        "t": t,
+        "df": df,
+        "pvalue": pvalue,
+        "p_bonferroni": adjusted,
+        "reject": adjusted < alpha,
+    })
+
+
+def report(summary, name="group"):
+    """The notebook's sequence of tests, printed from one summary table."""
+    for title, result in (("ANOVA", anova(summary)), ("Welch's ANOVA", welch_anova(summary)),
+                          ("Levene (Brown-Forsythe)", levene(summary))):
+        print(f"{title} by {name}:")
+        print(f"• F-statistic: {result.statistic:.4f}")
+        print(f"• P-value: {result.pvalue:.4f}")
+    print(f"\nPairwise Welch t-tests by {name} with Bonferroni correction:")
+    print(pairwise_tests(summary).to_string(index=False))
+
+
+if __name__ == "__main__":
+    from ragged import load_all
+    from window_stats import window_stats
+
+    report(summarize(window_stats(load_all(".")), "mean", by="window_size"), "window size")
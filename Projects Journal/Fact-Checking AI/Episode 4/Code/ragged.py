@@ -0,0 +1,152 @@
+"""
+Compact ragged-array storage for the sentence_diff window-distance datasets.
+
+Each sentence_diff_<w>.json holds, for every article, a variable-length list of
+euclidean distances and dot products between adjacent sentence windows. Here every
+metric is stored as
+
+    values  : float32 array with all the per-article lists concatenated (None -> NaN)
+    offsets : int64 array of length n_articles + 1, article i is values[offsets[i]:offsets[i + 1]]
+
+inside a directory sentence_diff_<w>.ragged/ made of plain .npy files plus a small
+meta.json with the window size. The .npy files are memory-mapped on load, so opening
+all four window sizes costs a few milliseconds and no copy.
+
+Convert the existing JSON files once:
+
+    python ragged.py sentence_diff_2.json sentence_diff_4.json sentence_diff_6.json sentence_diff_8.json
+
+and then, in the notebook:
+
+    datasets = load_all(".")                       # {2: RaggedDataset, 4: ..., ...}
+    datasets[2]["euclidean_distance"][0]           # distances of the first article
+    df2 = datasets[2].to_frame()                   # same layout as pd.read_json("sentence_diff_2.json")
+"""
+import itertools
+import json
+import os
+import sys
+
+import numpy as np
+
+WINDOW_SIZES = [2, 4, 6, 8]
+METRICS = ["euclidean_distance", "dot_product"]
+
+
+class RaggedArray:
+    """A list of variable-length float sequences backed by one flat array and an offsets array."""
+
+    def __init__(self, values, offsets):
+        self.values = values
+        self.offsets = offsets
+
+    @classmethod
+    def from_lists(cls, lists, dtype=np.float32):
+        lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # None becomes NaN when the flat list is converted to a float array
+        values = np.array(list(itertools.chain.from_iterable(lists)), dtype=np.float64).astype(dtype)
+        return cls(values, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def row_ids(self):
+        """Article index of every element of values."""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def to_lists(self):
+        """Plain Python lists with None for missing values, as in the original JSON."""
+        return [[None if np.isnan(x) else float(x) for x in self[i]] for i in range(len(self))]
+
+
+class RaggedDataset:
+    """All metrics of one window size."""
+
+    def __init__(self, window_size, metrics):
+        self.window_size = window_size
+        self.metrics = metrics
+
+    def __getitem__(self, name):
+        return self.metrics[name]
+
+    def __len__(self):
+        return len(next(iter(self.metrics.values())))
+
+    def to_frame(self):
+        """DataFrame with one list per cell, matching pd.read_json on the original file."""
+        import pandas as pd
+
+        frame = pd.DataFrame({name: array.to_lists() for name, array in self.metrics.items()})
+        frame.insert(0, "window_size", self.window_size)
+        return frame
+
+
+def save(path, dataset):
+    os.makedirs(path, exist_ok=True)
+    for name, array in dataset.metrics.items():
+        np.save(os.path.join(path, f"{name}.values.npy"), np.asarray(array.values, dtype=np.float32))
+        np.save(os.path.join(path, f"{name}.offsets.npy"), np.asarray(array.offsets, dtype=np.int64))
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"window_size": dataset.window_size, "metrics": list(dataset.metrics),
+                   "n_articles": len(dataset)}, f, indent=4)
+
+
+def load(path, mmap=True):
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    mode = "r" if mmap else None
+    metrics = {
+        name: RaggedArray(np.load(os.path.join(path, f"{name}.values.npy"), mmap_mode=mode),
+                          np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode=mode))
+        for name in meta["metrics"]
+    }
+    return RaggedDataset(meta["window_size"], metrics)
+
+
+def ragged_path(directory, window_size):
+    return os.path.join(directory, f"sentence_diff_{window_size}.ragged")
+
+
+def load_all(directory=".", window_sizes=WINDOW_SIZES, mmap=True):
+    """Load every window size, converting the JSON file first if no ragged copy exists yet."""
+    datasets = {}
+    for size in window_sizes:
+        path = ragged_path(directory, size)
+        if not os.path.exists(path):
+            convert_json(os.path.join(directory, f"sentence_diff_{size}.json"), path)
+        datasets[size] = load(path, mmap=mmap)
+    return datasets
+
+
+def read_json(json_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    metrics = {name: RaggedArray.from_lists(data[name]) for name in METRICS if name in data}
+    return RaggedDataset(data["window_size"], metrics)
+
+
+def convert_json(json_path, out_path=None):
+    """Convert one sentence_diff_<w>.json file; returns the output directory."""
+    if out_path is None:
+        out_path = os.path.splitext(json_path)[0] + ".ragged"
+    save(out_path, read_json(json_path))
+    return out_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python ragged.py sentence_diff_2.json [sentence_diff_4.json ...]")
+        sys.exit(1)
+    for json_path in sys.argv[1:]:
+        out_path = convert_json(json_path)
+        size = sum(os.path.getsize(os.path.join(out_path, f)) for f in os.listdir(out_path))
+        print(f"{json_path} ({os.path.getsize(json_path) / 1e6:.2f} MB) -> {out_path} ({size / 1e6:.2f} MB)")
@@ -0,0 +1,98 @@
+"""
+Cross-window-size comparison of the sentence_diff distance sequences.
+
+Replaces calculate_all_differences, which padded two Python lists per row with None
+and subtracted them element by element through dfcomplete.apply(..., axis=1), for
+window sizes 2 and 4 only.
+
+Here every window size is aligned into one array of shape (n_window_sizes, n_values):
+each article gets max(len) slots across all window sizes, each sequence is written
+left-aligned into its slots and the rest is NaN (the None padding of the notebook).
+All pairwise differences (2-4, 2-6, ..., 6-8) are then a single broadcasted
+subtraction; each pair is cut back to max(len) of its own two sequences, exactly
+as the notebook padded them.
+
+    from ragged import load_all
+    from window_compare import pairwise_differences, difference_stats
+
+    datasets = load_all(".")
+    diffs = pairwise_differences(datasets)        # {(2, 4): RaggedArray, (2, 6): ..., ...}
+    diffs[(2, 4)][0]                              # same values as all_differences of article 0
+    summary = difference_stats(datasets)          # article, window_a, window_b, count, mean, std, ...
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from ragged import RaggedArray
+from window_stats import QUANTILES, describe
+
+
+def align(arrays):
+    """Common offsets and a (len(arrays), n_values) matrix with every ragged array padded with NaN."""
+    lengths = np.max([array.lengths for array in arrays], axis=0)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    matrix = np.full((len(arrays), offsets[-1]), np.nan, dtype=np.float64)
+    for i, array in enumerate(arrays):
+        rows = array.row_ids()
+        # Position inside the article, moved to the article's slots in the common layout
+        target = offsets[rows] + (np.arange(len(rows)) - array.offsets[rows])
+        matrix[i, target] = array.values
+    return offsets, matrix
+
+
+def pairwise_differences(datasets, metric="euclidean_distance", pairs=None):
+    """{(a, b): RaggedArray of a - b} for every pair of window sizes (a < b by default)."""
+    sizes = sorted(datasets)
+    if pairs is None:
+        pairs = list(itertools.combinations(sizes, 2))
+    arrays = [datasets[size][metric] for size in sizes]
+    offsets, matrix = align(arrays)
+
+    index = {size: i for i, size in enumerate(sizes)}
+    first = [index[a] for a, _ in pairs]
+    second = [index[b] for _, b in pairs]
+    differences = matrix[first] - matrix[second]  # NaN wherever either side is missing
+
+    # Like the notebook, each pair is only padded to the longer of its two sequences
+    rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    position = np.arange(len(rows)) - offsets[rows]
+    lengths = np.array([array.lengths for array in arrays])
+    result = {}
+    for pair, i, j, difference in zip(pairs, first, second, differences):
+        pair_lengths = np.maximum(lengths[i], lengths[j])
+        pair_offsets = np.zeros_like(offsets)
+        np.cumsum(pair_lengths, out=pair_offsets[1:])
+        result[pair] = RaggedArray(difference[position < pair_lengths[rows]], pair_offsets)
+    return result
+
+
+def difference_stats(datasets, metric="euclidean_distance", pairs=None, quantiles=QUANTILES, ddof=0):
+    """Per-article statistics of every pairwise difference, as a tidy frame."""
+    frames = []
+    for (a, b), difference in pairwise_differences(datasets, metric, pairs).items():
+        frame = describe(difference, quantiles, ddof)
+        frame.insert(1, "window_a", a)
+        frame.insert(2, "window_b", b)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_frame(differences):
+    """One list column per pair (e.g. differences_2_4), like dfcomplete['all_differences']."""
+    return pd.DataFrame({f"differences_{a}_{b}": array.to_lists() for (a, b), array in differences.items()})
+
+
+if __name__ == "__main__":
+    import time
+
+    from ragged import load_all
+
+    datasets = load_all(".")
+    start = time.perf_counter()
+    summary = difference_stats(datasets)
+    print(f"{len(summary)} rows in {time.perf_counter() - start:.3f} s")
+    print(summary.groupby(["window_a", "window_b"])["mean"].describe())
@@ -0,0 +1,269 @@
+"""
+Approximate nearest-neighbour index over article window embeddings, for claim lookup.
+
+Brute force compares a claim with every window of every article. This index follows
+the random-projection idea of AI Made Simple/Random Projections: each of n_tables
+tables projects the (unit) vectors on n_bits random Gaussian directions and keeps
+only the signs, so similar windows share the same n_bits-bit code with high
+probability (signed random projections / SimHash LSH). A query looks up its code,
+plus the codes at Hamming distance 1 (multi-probe), in every table and re-ranks the
+few candidates exactly by euclidean distance.
+
+Each table is a sorted array of codes with the matching row numbers, so lookups are
+np.searchsorted calls; new windows can be added at any time (the tables are re-sorted
+lazily on the next query). Ids are (position of the article in the JSON, first
+sentence); the index remembers the Links it already holds, so running build again on a
+grown Corriere.json embeds only the new articles.
+
+On disk the index is a directory: every save() writes only the windows added since the
+previous one as a new part-NNNN/ (vectors, ids, codes and the Links of its articles),
+then rewrites the small files: meta.json (with the embedder's model_id and the window
+size; query refuses an index built with a different model) and the sorted tables
+(tables.npy, order.npy), so a query process starts without sorting them again.
+
+    python window_index.py build Corriere.json --window 4            # or add the new articles
+    python window_index.py query "Il governo ha approvato la manovra" -k 5
+    python window_index.py recall -k 10                                # recall and latency vs exact search
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+INDEX_DIR = "window_index"
+N_TABLES = 16
+N_BITS = 12
+
+
+class WindowIndex:
+    """Signed-random-projection LSH tables over unit vectors, with exact re-ranking of the candidates."""
+
+    def __init__(self, dim, n_tables=N_TABLES, n_bits=N_BITS, seed=0, model_id=None, window=None):
+        self.dim = dim
+        self.model_id = model_id  # Embedder that produced the vectors
+        self.window = window      # Sentences per window
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.seed = seed
+        self.planes = np.random.default_rng(seed).standard_normal((n_tables * n_bits, dim)).astype(np.float32)
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.ids = np.zeros((0, 2), dtype=np.int64)
+        self.codes = np.zeros((0, n_tables), dtype=np.uint64)
+        self.articles = {}  # Link -> position of the article in the source JSON
+        self._saved = (None, 0, 0)  # (directory, rows, parts) already on disk
+        self._unsaved_articles = {}  # Links added since the last save
+        self._sorted = None  # (codes sorted per table, row order per table), rebuilt after add()
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def hash(self, vectors):
+        """(n, n_tables) codes: the sign bits of n_bits projections per table."""
+        bits = (np.asarray(vectors, dtype=np.float32) @ self.planes.T > 0).reshape(-1, self.n_tables, self.n_bits)
+        weights = np.uint64(1) << np.arange(self.n_bits, dtype=np.uint64)
+        return (bits.astype(np.uint64) * weights).sum(axis=2, dtype=np.uint64)
+
+    def add(self, vectors, ids, articles=None):
+        """Insert unit vectors with their (article, first sentence) ids, and the {Link: article} they come from."""
+        self.articles.update(articles or {})
+        self._unsaved_articles.update(articles or {})
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.vectors = np.concatenate([self.vectors, vectors])
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64).reshape(-1, 2)])
+        self.codes = np.concatenate([self.codes, self.hash(vectors)])
+        self._sorted = None
+
+    def _tables(self):
+        if self._sorted is None:
+            order = np.argsort(self.codes, axis=0, kind="stable")
+            self._sorted = (np.take_along_axis(self.codes, order, axis=0), order)
+        return self._sorted
+
+    def candidates(self, vector, multiprobe=True):
+        """Rows sharing a bucket with the vector in at least one table."""
+        codes = self.hash(vector[None])[0]
+        probes = codes[:, None]
+        if multiprobe:
+            flips = np.uint64(1) << np.arange(self.n_bits, dtype=np.uint64)
+            probes = np.concatenate([probes, codes[:, None] ^ flips[None]], axis=1)
+        sorted_codes, order = self._tables()
+        rows = []
+        for table in range(self.n_tables):
+            low = np.searchsorted(sorted_codes[:, table], probes[table], side="left")
+            high = np.searchsorted(sorted_codes[:, table], probes[table], side="right")
+            rows += [order[lo:hi, table] for lo, hi in zip(low, high) if hi > lo]
+        return np.unique(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64)
+
+    def query(self, vector, k=10, multiprobe=True):
+        """(ids, euclidean distances) of the k closest candidate windows."""
+        vector = np.asarray(vector, dtype=np.float32)
+        rows = self.candidates(vector, multiprobe)
+        return self._rank(vector, rows, k)
+
+    def exact(self, vector, k=10):
+        """Brute-force reference over every stored window."""
+        return self._rank(np.asarray(vector, dtype=np.float32), np.arange(len(self)), k)
+
+    def _rank(self, vector, rows, k):
+        # Unit vectors: ||a - b||^2 = 2 - 2 a.b
+        squared = np.maximum(2 - 2 * (self.vectors[rows] @ vector), 0)
+        top = np.argpartition(squared, k - 1)[:k] if len(rows) > k else np.arange(len(rows))
+        top = top[np.argsort(squared[top])]
+        return self.ids[rows[top]], np.sqrt(squared[top])
+
+    def save(self, directory=INDEX_DIR):
+        """Write the windows added since the last save as a new part, then meta.json and the sorted tables."""
+        os.makedirs(directory, exist_ok=True)
+        saved_dir, saved_rows, parts = self._saved
+        if saved_dir != directory:
+            saved_rows, parts = 0, len(_parts(directory))
+        if not os.path.exists(os.path.join(directory, "planes.npy")):
+            np.save(os.path.join(directory, "planes.npy"), self.planes)
+
+        if saved_dir != directory:
+            self._unsaved_articles = dict(self.articles)
+        if len(self) > saved_rows or self._unsaved_articles:
+            part = os.path.join(directory, f"part-{parts:04d}")
+            os.makedirs(part, exist_ok=True)
+            for name in ("vectors", "ids", "codes"):
+                np.save(os.path.join(part, f"{name}.npy"), getattr(self, name)[saved_rows:])
+            with open(os.path.join(part, "articles.json"), "w", encoding="utf-8") as f:
+                json.dump(self._unsaved_articles, f, ensure_ascii=False)
+            self._unsaved_articles = {}
+            parts += 1
+
+        sorted_codes, order = self._tables()
+        np.save(os.path.join(directory, "tables.npy"), sorted_codes)
+        np.save(os.path.join(directory, "order.npy"), order)
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "n_tables": self.n_tables, "n_bits": self.n_bits,
+                       "seed": self.seed, "model_id": self.model_id, "window": self.window,
+                       "size": len(self)}, f, indent=4)
+        self._saved = (directory, len(self), parts)
+
+    @classmethod
+    def load(cls, directory=INDEX_DIR):
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(meta["dim"], meta["n_tables"], meta["n_bits"], meta["seed"], meta.get("model_id"),
+                    meta.get("window"))
+        index.planes = np.load(os.path.join(directory, "planes.npy"))
+        parts = _parts(directory)
+        for name in ("vectors", "ids", "codes"):
+            arrays = [np.load(os.path.join(part, f"{name}.npy")) for part in parts]
+            if arrays:
+                setattr(index, name, np.concatenate(arrays))
+        for part in parts:
+            with open(os.path.join(part, "articles.json"), "r", encoding="utf-8") as f:
+                index.articles.update(json.load(f))
+
+        tables_path = os.path.join(directory, "tables.npy")
+        if os.path.exists(tables_path):
+            sorted_codes = np.load(tables_path)
+            if len(sorted_codes) == len(index):
+                index._sorted = (sorted_codes, np.load(os.path.join(directory, "order.npy")))
+        index._saved = (directory, len(index), len(parts))
+        return index
+
+    def check_model(self, model_id):
+        """Raise ValueError if the index was built with a different (or unrecorded) embedder."""
+        if self.model_id != model_id:
+            raise ValueError(f"index built with model {self.model_id!r}, queried with {model_id!r}: "
+                             "use the same --model or rebuild the index")
+
+
+def _parts(directory):
+    parts = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.startswith("part-"))
+    if os.path.exists(os.path.join(directory, "vectors.npy")):
+        parts.insert(0, directory)  # Index saved before the parts layout: its data is the first part
+    return parts
+
+
+def new_articles(path, index=None):
+    """(positions, contents, {Link: position}) of the articles in the JSON not yet in the index."""
+    with open(path, "r", encoding="utf-8") as f:
+        news = json.load(f)["news"]
+    known = index.articles if index is not None else {}
+    positions = [i for i, item in enumerate(news) if item["Link"] not in known]
+    return (np.array(positions, dtype=np.int64), [news[i]["Content"] for i in positions],
+            {news[i]["Link"]: i for i in positions})
+
+
+def measure_recall(index, queries, k=10, multiprobe=True):
+    """Mean recall@k of the index against exact search, with mean latency of both in milliseconds.
+
+    A returned window counts as a true neighbour when it is no farther than the k-th exact one.
+    """
+    recalls = []
+    ann_time = exact_time = 0.0
+    for vector in queries:
+        start = time.perf_counter()
+        _, found = index.query(vector, k, multiprobe)
+        ann_time += time.perf_counter() - start
+        start = time.perf_counter()
+        _, truth = index.exact(vector, k)
+        exact_time += time.perf_counter() - start
+        # Compared by distance, so that windows with identical text count as equivalent
+        recalls.append(np.count_nonzero(found <= truth[-1] + 1e-6) / len(truth))
+    return {"recall": float(np.mean(recalls)), "ann_ms": 1000 * ann_time / len(queries),
+            "exact_ms": 1000 * exact_time / len(queries)}
+
+
+if __name__ == "__main__":
+    from embed_windows import HashingEmbedder, SentenceTransformerEmbedder, embed_sentences, normalize, \
+        sliding_windows
+
+    parser = argparse.ArgumentParser(description="LSH index over article window embeddings")
+    parser.add_argument("command", choices=["build", "query", "recall"])
+    parser.add_argument("text", nargs="?", help="articles JSON for build, claim text for query")
+    parser.add_argument("--index", default=INDEX_DIR)
+    parser.add_argument("--window", type=int, default=4, help="sentences per window (build)")
+    parser.add_argument("--model", help="sentence-transformers model (default: hashing stand-in)")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="number of queries for recall")
+    args = parser.parse_args()
+
+    embedder = SentenceTransformerEmbedder(args.model) if args.model else HashingEmbedder()
+    if args.command == "build":
+        index = WindowIndex.load(args.index) if os.path.exists(args.index) else None
+        if index is not None:
+            try:
+                index.check_model(embedder.model_id)
+            except ValueError as error:
+                parser.error(str(error))
+            if index.window is not None and index.window != args.window:
+                parser.error(f"index built with --window {index.window}")
+        positions, contents, articles = new_articles(args.text, index)
+        if not contents:
+            print(f"no new articles, {len(index) if index is not None else 0} windows in the index")
+            raise SystemExit
+        embeddings, offsets = embed_sentences(contents, embedder)
+        vectors, ids = sliding_windows(embeddings, offsets, args.window)
+        ids[:, 0] = positions[ids[:, 0]]  # Position of the article in the JSON
+        if index is None:
+            index = WindowIndex(vectors.shape[1], model_id=embedder.model_id, window=args.window)
+        index.add(vectors, ids, articles)
+        index.save(args.index)
+        print(f"{len(articles)} new articles, {len(vectors)} windows added, {len(index)} in the index")
+    elif args.command == "query":
+        index = WindowIndex.load(args.index)
+        try:
+            index.check_model(embedder.model_id)
+        except ValueError as error:
+            parser.error(str(error))
+        claim = normalize(np.asarray(embedder.embed([args.text]), dtype=np.float64))[0]
+        start = time.perf_counter()
+        ids, distances = index.query(claim, args.k)
+        print(f"{(time.perf_counter() - start) * 1000:.2f} ms")
+        if not len(ids):
+            print("no window shares a bucket with the claim")
+        for (article, sentence), distance in zip(ids, distances):
+            print(f"article {article}, sentences from {sentence}: distance {distance:.4f}")
+    else:
+        index = WindowIndex.load(args.index)
+        rows = np.random.default_rng(0).choice(len(index), min(args.queries, len(index)), replace=False)
+        # Perturbed copies of stored windows, so the true neighbours are not trivially the query itself
+        noise = np.random.default_rng(1).standard_normal((len(rows), index.dim)) * 0.5 / np.sqrt(index.dim)
+        print(measure_recall(index, normalize(index.vectors[rows] + noise), args.k))